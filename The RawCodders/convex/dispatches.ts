@@ -1,5 +1,32 @@
 import { v } from "convex/values";
 import { query, mutation } from "./_generated/server";
+import { Id } from "./_generated/dataModel";
+import { notifyChanges } from "./webhooks";
+
+// Dispatch mutations also flip personnel availability and equipment status.
+function resourceUpdates(
+    personnelIds: (Id<"personnel"> | undefined)[],
+    equipmentIds: (Id<"equipment"> | undefined)[]
+) {
+    return [
+        ...personnelIds
+            .filter((id): id is Id<"personnel"> => id !== undefined)
+            .map((id) => ({
+                table: "personnel" as const,
+                operation: "update" as const,
+                id,
+                fields: ["isAvailable"],
+            })),
+        ...equipmentIds
+            .filter((id): id is Id<"equipment"> => id !== undefined)
+            .map((id) => ({
+                table: "equipment" as const,
+                operation: "update" as const,
+                id,
+                fields: ["status"],
+            })),
+    ];
+}
 
 export const listDispatches = query({
     args: {
@@ -45,7 +72,12 @@ export const insertDispatch = mutation({
             await ctx.db.patch(args.equipmentId, { status: "In Use" });
         }
 
-        return await ctx.db.insert("dispatches", args);
+        const dispatchId = await ctx.db.insert("dispatches", args);
+        await notifyChanges(ctx, [
+            { table: "dispatches", operation: "insert", id: dispatchId },
+            ...resourceUpdates([args.personnelId], [args.equipmentId]),
+        ]);
+        return dispatchId;
     },
 });
 
@@ -66,6 +98,10 @@ export const deleteDispatch = mutation({
         }
 
         await ctx.db.delete(args.dispatchId);
+        await notifyChanges(ctx, [
+            { table: "dispatches", operation: "delete", id: args.dispatchId },
+            ...resourceUpdates([dispatch.personnelId], [dispatch.equipmentId]),
+        ]);
     },
 });
 
@@ -81,8 +117,11 @@ export const updateDispatch = mutation({
         const dispatch = await ctx.db.get(dispatchId);
         if (!dispatch) throw new Error("Dispatch Not Found");
 
+        const personnelChanged = fields.personnelId && fields.personnelId !== dispatch.personnelId;
+        const equipmentChanged = fields.equipmentId && fields.equipmentId !== dispatch.equipmentId;
+
         // Handle personnel changes
-        if (fields.personnelId && fields.personnelId !== dispatch.personnelId) {
+        if (personnelChanged && fields.personnelId) {
             // Mark old personnel available
             if (dispatch.personnelId) {
                 await ctx.db.patch(dispatch.personnelId, { isAvailable: true });
@@ -92,7 +131,7 @@ export const updateDispatch = mutation({
         }
 
         // Handle equipment changes
-        if (fields.equipmentId && fields.equipmentId !== dispatch.equipmentId) {
+        if (equipmentChanged && fields.equipmentId) {
             // Mark old equipment available
             if (dispatch.equipmentId) {
                 await ctx.db.patch(dispatch.equipmentId, { status: "Available" });
@@ -102,6 +141,13 @@ export const updateDispatch = mutation({
         }
 
         await ctx.db.patch(dispatchId, fields);
+        await notifyChanges(ctx, [
+            { table: "dispatches", operation: "update", id: dispatchId, fields: Object.keys(fields) },
+            ...resourceUpdates(
+                personnelChanged ? [dispatch.personnelId, fields.personnelId] : [],
+                equipmentChanged ? [dispatch.equipmentId, fields.equipmentId] : []
+            ),
+        ]);
         return dispatchId;
     },
 });
\ No newline at end of file
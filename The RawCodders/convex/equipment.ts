@@ -1,5 +1,6 @@
 import { v } from "convex/values";
 import { query, mutation } from "./_generated/server";
+import { notifyChanges } from "./webhooks";
 
 export const EquipmentStatus = v.union(
   v.literal("Available"),
@@ -17,7 +18,9 @@ export const insertEquipment = mutation({
         lastInspected: v.string(),
     },
     handler: async (ctx, args) => {
-        return await ctx.db.insert('equipment', args);
+        const equipmentId = await ctx.db.insert('equipment', args);
+        await notifyChanges(ctx, [{ table: "equipment", operation: "insert", id: equipmentId }]);
+        return equipmentId;
     },
 });
 
@@ -36,6 +39,9 @@ export const updateEquipment = mutation({
         if (!equipment) throw new Error("Equipment Not Found");
 
         await ctx.db.patch(equipmentId, fields);
+        await notifyChanges(ctx, [
+            { table: "equipment", operation: "update", id: equipmentId, fields: Object.keys(fields) },
+        ]);
         return equipmentId;
     },
 });
@@ -68,5 +74,6 @@ export const deleteEquipment = mutation({
     args: { equipmentId: v.id("equipment") },
     handler: async (ctx, args) => {
         await ctx.db.delete(args.equipmentId);
+        await notifyChanges(ctx, [{ table: "equipment", operation: "delete", id: args.equipmentId }]);
     },
 });
\ No newline at end of file
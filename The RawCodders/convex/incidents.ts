@@ -1,5 +1,6 @@
 import { v } from "convex/values";
 import { query, mutation } from "./_generated/server";
+import { notifyChanges } from "./webhooks";
 
 export const IncidentStatus = v.union(
   v.literal("standby"),
@@ -49,7 +50,9 @@ export const insertIncident = mutation({
         reportedDate: v.string()
     },
     handler: async (ctx, args) => {
-        return await ctx.db.insert("incidents", args);
+        const incidentId = await ctx.db.insert("incidents", args);
+        await notifyChanges(ctx, [{ table: "incidents", operation: "insert", id: incidentId }]);
+        return incidentId;
     },
 });
 
@@ -60,6 +63,9 @@ export const updateIncidentStatus = mutation({
     },
     handler: async (ctx, args) => {
         await ctx.db.patch(args.incidentId, { status: args.status });
+        await notifyChanges(ctx, [
+            { table: "incidents", operation: "update", id: args.incidentId, fields: ["status"] },
+        ]);
         return args.incidentId;
     },
 });
@@ -68,5 +74,6 @@ export const deleteIncident = mutation({
     args: { incidentId: v.id("incidents") },
     handler: async (ctx, args) => {
         await ctx.db.delete(args.incidentId);
+        await notifyChanges(ctx, [{ table: "incidents", operation: "delete", id: args.incidentId }]);
     },
 });
\ No newline at end of file
@@ -1,5 +1,6 @@
 import { v } from "convex/values";
 import { query, mutation } from "./_generated/server";
+import { notifyChanges } from "./webhooks";
 
 export const listMaintenanceLogs = query({
     args: {
@@ -32,7 +33,12 @@ export const insertMaintenanceLog = mutation({
     handler: async (ctx, args) => {
         // Automatically put equipment into Maintenance mode
         await ctx.db.patch(args.equipmentId, { status: "Maintenance" });
-        return await ctx.db.insert("maintenance_logs", args);
+        const logId = await ctx.db.insert("maintenance_logs", args);
+        await notifyChanges(ctx, [
+            { table: "maintenance_logs", operation: "insert", id: logId },
+            { table: "equipment", operation: "update", id: args.equipmentId, fields: ["status"] },
+        ]);
+        return logId;
     },
 });
 
@@ -47,5 +53,6 @@ export const deleteMaintenanceLog = mutation({
         // await ctx.db.patch(log.equipmentId, { status: "Available" });
 
         await ctx.db.delete(args.logId);
+        await notifyChanges(ctx, [{ table: "maintenance_logs", operation: "delete", id: args.logId }]);
     },
 });
\ No newline at end of file
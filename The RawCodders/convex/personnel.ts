@@ -1,5 +1,6 @@
 import { v } from "convex/values";
 import { query, mutation } from "./_generated/server";
+import { notifyChanges } from "./webhooks";
 
 export const listPersonnel = query({
     args: {
@@ -36,7 +37,9 @@ export const insertPersonnel = mutation({
         isAvailable: v.boolean(),
     },
     handler: async (ctx, args) => {
-        return await ctx.db.insert("personnel", args);
+        const personnelId = await ctx.db.insert("personnel", args);
+        await notifyChanges(ctx, [{ table: "personnel", operation: "insert", id: personnelId }]);
+        return personnelId;
     },
 });
 
@@ -52,6 +55,9 @@ export const updatePersonnel = mutation({
     handler: async (ctx, args) => {
         const { personnelId, ...fields } = args;
         await ctx.db.patch(personnelId, fields);
+        await notifyChanges(ctx, [
+            { table: "personnel", operation: "update", id: personnelId, fields: Object.keys(fields) },
+        ]);
         return personnelId;
     },
 });
@@ -60,6 +66,7 @@ export const deletePersonnel = mutation({
     args: { personnelId: v.id("personnel") },
     handler: async (ctx, args) => {
         await ctx.db.delete(args.personnelId);
+        await notifyChanges(ctx, [{ table: "personnel", operation: "delete", id: args.personnelId }]);
     },
 });
 
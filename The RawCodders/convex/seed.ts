@@ -1,4 +1,5 @@
 import { mutation } from "./_generated/server";
+import { Change, notifyChanges } from "./webhooks";
 
 // ============================================================
 // Deterministic, sensible demo seed for GOPR-style schema
@@ -6,6 +7,7 @@ import { mutation } from "./_generated/server";
 // - Hardcoded incidents (20 total, 2 active)
 // - Upsert personnel/equipment by email/name
 // - Seed incidents/dispatches/logs/reports only if empty
+// - Report every row it writes to the AI service in one webhook
 // ============================================================
 
 // -----------------------------
@@ -738,7 +740,7 @@ const MISSION_REPORT_SEED: Array<{
 // Upsert Personnel (ALWAYS ensure sensible set exists)
 // -----------------------------
 
-async function ensurePersonnel(ctx: any) {
+async function ensurePersonnel(ctx: any, changes: Change[]) {
   let created = 0;
   let updated = 0;
 
@@ -765,10 +767,12 @@ async function ensurePersonnel(ctx: any) {
 
     if (existing) {
       await ctx.db.patch(existing._id, doc);
+      changes.push({ table: "personnel", operation: "update", id: existing._id, fields: Object.keys(doc) });
       idsByEmail.set(p.email, existing._id);
       updated++;
     } else {
       const id = await ctx.db.insert("personnel", doc);
+      changes.push({ table: "personnel", operation: "insert", id });
       idsByEmail.set(p.email, id);
       created++;
     }
@@ -789,7 +793,7 @@ async function ensurePersonnel(ctx: any) {
 // Upsert Equipment (deterministic by name)
 // -----------------------------
 
-async function ensureEquipment(ctx: any) {
+async function ensureEquipment(ctx: any, changes: Change[]) {
   let created = 0;
   let updated = 0;
 
@@ -812,10 +816,12 @@ async function ensureEquipment(ctx: any) {
     const found = byName.get(e.name);
     if (found) {
       await ctx.db.patch(found._id, doc);
+      changes.push({ table: "equipment", operation: "update", id: found._id, fields: Object.keys(doc) });
       idsByName.set(e.name, found._id);
       updated++;
     } else {
       const id = await ctx.db.insert("equipment", doc);
+      changes.push({ table: "equipment", operation: "insert", id });
       idsByName.set(e.name, id);
       created++;
     }
@@ -839,7 +845,8 @@ async function ensureEquipment(ctx: any) {
 async function seedIncidentsAndDispatchesIfEmpty(
   ctx: any,
   personnelIdByEmail: Map<string, any>,
-  equipmentIdByName: Map<string, any>
+  equipmentIdByName: Map<string, any>,
+  changes: Change[]
 ) {
   let createdIncidents = 0;
   let createdDispatches = 0;
@@ -869,6 +876,7 @@ async function seedIncidentsAndDispatchesIfEmpty(
       reportedDate: daysAgoIso(inc.daysBack, 9, 15),
     });
 
+    changes.push({ table: "incidents", operation: "insert", id: incidentId });
     incidentIds.push(incidentId);
     incidentIdByCode.set(inc.code, incidentId);
     createdIncidents++;
@@ -878,12 +886,13 @@ async function seedIncidentsAndDispatchesIfEmpty(
       const personnelId = personnelIdByEmail.get(email);
       if (!personnelId) continue;
 
-      await ctx.db.insert("dispatches", {
+      const dispatchId = await ctx.db.insert("dispatches", {
         incidentId,
         personnelId,
         equipmentId: undefined,
         dispatchTime: daysAgoIso(inc.daysBack, 9, 20),
       });
+      changes.push({ table: "dispatches", operation: "insert", id: dispatchId });
       createdDispatches++;
     }
 
@@ -892,12 +901,13 @@ async function seedIncidentsAndDispatchesIfEmpty(
       const equipmentId = equipmentIdByName.get(eqName);
       if (!equipmentId) continue;
 
-      await ctx.db.insert("dispatches", {
+      const dispatchId = await ctx.db.insert("dispatches", {
         incidentId,
         personnelId: undefined,
         equipmentId,
         dispatchTime: daysAgoIso(inc.daysBack, 9, 25),
       });
+      changes.push({ table: "dispatches", operation: "insert", id: dispatchId });
       createdDispatches++;
     }
   }
@@ -918,7 +928,8 @@ async function seedIncidentsAndDispatchesIfEmpty(
 
 async function seedMaintenanceLogsIfEmpty(
   ctx: any,
-  equipmentIdByName: Map<string, any>
+  equipmentIdByName: Map<string, any>,
+  changes: Change[]
 ) {
   let createdMaintenanceLogs = 0;
 
@@ -935,12 +946,13 @@ async function seedMaintenanceLogsIfEmpty(
     const equipmentId = equipmentIdByName.get(log.equipmentName);
     if (!equipmentId) continue;
 
-    await ctx.db.insert("maintenance_logs", {
+    const logId = await ctx.db.insert("maintenance_logs", {
       equipmentId,
       issueType: log.issueType,
       description: log.description,
       logDate: daysAgoIso(log.daysAgo, 11, 0),
     });
+    changes.push({ table: "maintenance_logs", operation: "insert", id: logId });
     createdMaintenanceLogs++;
   }
 
@@ -1019,21 +1031,26 @@ async function seedMissionReportsIfEmpty(
 
 export const seed = mutation({
   handler: async (ctx) => {
+    // Rows written below, reported to the AI service at the end
+    const changes: Change[] = [];
+
     // 1) Always ensure sensible personnel/equipment are present
-    const personnel = await ensurePersonnel(ctx);
-    const equipment = await ensureEquipment(ctx);
+    const personnel = await ensurePersonnel(ctx, changes);
+    const equipment = await ensureEquipment(ctx, changes);
 
     // 2) Seed hardcoded incidents + dispatches (only if empty)
     const incidentsResult = await seedIncidentsAndDispatchesIfEmpty(
       ctx,
       personnel.personnelIdByEmail,
-      equipment.equipmentIdByName
+      equipment.equipmentIdByName,
+      changes
     );
 
     // 3) Seed hardcoded maintenance logs (only if empty)
     const maintenanceResult = await seedMaintenanceLogsIfEmpty(
       ctx,
-      equipment.equipmentIdByName
+      equipment.equipmentIdByName,
+      changes
     );
 
     // 4) Seed hardcoded mission reports (only if empty and incidents were seeded now)
@@ -1043,6 +1060,9 @@ export const seed = mutation({
       personnel.personnelIdByEmail
     );
 
+    // 5) Let the AI service drop or patch its cached snapshot and insights
+    await notifyChanges(ctx, changes);
+
     return [
       "✅ Seed completed (sensible demo data)",
       `Personnel: +${personnel.createdPersonnel} created, ${personnel.updatedPersonnel} updated (total: ${personnel.totalPersonnel})`,
@@ -0,0 +1,85 @@
+import { v } from "convex/values";
+import { internalAction, MutationCtx } from "./_generated/server";
+import { internal } from "./_generated/api";
+import { Id, TableNames } from "./_generated/dataModel";
+
+type ChangeOperation = "insert" | "update" | "delete";
+
+export type Change = {
+    table: TableNames;
+    operation: ChangeOperation;
+    id: Id<TableNames>;
+    // For updates, the fields the mutation wrote; lets the service skip work for
+    // fields its insights do not read. Omitted means "unknown".
+    fields?: string[];
+};
+
+// Tell the AI service which rows a mutation touched, so it can patch or drop its
+// cached data. Call this at the end of the mutation; the HTTP request itself
+// runs in a scheduled action. Only inserts carry the document: deliveries can
+// arrive out of order, so the service invalidates on updates instead of patching.
+export async function notifyChanges(ctx: MutationCtx, changes: Change[]) {
+    const payload = await Promise.all(
+        changes.map(async (change) => ({
+            table: change.table,
+            operation: change.operation,
+            id: change.id,
+            document: change.operation === "insert" ? await ctx.db.get(change.id) : null,
+            fields: change.fields ?? null,
+        }))
+    );
+    await ctx.scheduler.runAfter(0, internal.webhooks.sendChanges, { changes: payload });
+}
+
+async function sign(secret: string, body: string): Promise<string> {
+    const encoder = new TextEncoder();
+    const key = await crypto.subtle.importKey(
+        "raw",
+        encoder.encode(secret),
+        { name: "HMAC", hash: "SHA-256" },
+        false,
+        ["sign"]
+    );
+    const mac = await crypto.subtle.sign("HMAC", key, encoder.encode(body));
+    return Array.from(new Uint8Array(mac))
+        .map((byte) => byte.toString(16).padStart(2, "0"))
+        .join("");
+}
+
+export const sendChanges = internalAction({
+    args: {
+        changes: v.array(
+            v.object({
+                table: v.string(),
+                operation: v.union(v.literal("insert"), v.literal("update"), v.literal("delete")),
+                id: v.string(),
+                document: v.any(),
+                fields: v.union(v.array(v.string()), v.null()),
+            })
+        ),
+    },
+    returns: v.null(),
+    handler: async (_ctx, args) => {
+        // Both are synced from .env.local by the deploy workflow; AI_WEBHOOK_SECRET
+        // is shared with the ai-service container. Without them the AI service
+        // does not cache insights and refetches on every request.
+        const serviceUrl = process.env.AI_SERVICE_URL;
+        const secret = process.env.AI_WEBHOOK_SECRET;
+        if (!serviceUrl || !secret) return null;
+
+        // sent_at is signed with the body; the service rejects stale or replayed deliveries.
+        const body = JSON.stringify({ sent_at: Date.now(), changes: args.changes });
+        const res = await fetch(`${serviceUrl.replace(/\/$/, "")}/webhooks/convex-change`, {
+            method: "POST",
+            headers: {
+                "Content-Type": "application/json",
+                "X-Webhook-Signature": `sha256=${await sign(secret, body)}`,
+            },
+            body,
+        });
+        if (!res.ok) {
+            console.error(`AI service change webhook failed: ${res.status} ${await res.text()}`);
+        }
+        return null;
+    },
+});
@@ -1,13 +1,21 @@
-from .temporal import analyze_temporal
-from .demographics import analyze_demographics
-from .products import analyze_products
-from .transactions import analyze_transactions
-from .returns import analyze_returns
-
-__all__ = [
-    "analyze_temporal",
-    "analyze_demographics",
-    "analyze_products",
-    "analyze_transactions",
-    "analyze_returns",
-]
+import importlib
+
+# Analyzers pull in pandas and scipy, so each submodule is only imported when
+# one of its functions is first accessed.
+_EXPORTS = {
+    "analyze_temporal": ".temporal",
+    "analyze_demographics": ".demographics",
+    "analyze_products": ".products",
+    "analyze_transactions": ".transactions",
+    "analyze_returns": ".returns",
+    "StreamingAnalytics": ".streaming",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        module = importlib.import_module(_EXPORTS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
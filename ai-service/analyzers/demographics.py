@@ -1,11 +1,19 @@
 from typing import Any
 
 import pandas as pd
-from scipy import stats
 
+from .significance import cached, grouped_confidence_intervals, pairwise_mannwhitney, snapshot_hash
+from .streaming import StreamingAnalytics
 
-def analyze_demographics(data: dict[str, list[dict[str, Any]]]) -> dict:
+
+def analyze_demographics(
+    data: dict[str, list[dict[str, Any]]],
+    approximate: StreamingAnalytics | None = None,
+) -> dict:
     """Analyze spending patterns by demographics."""
+    if approximate is not None:
+        return approximate.demographics_report()
+
     clients = data["clients"]
     transactions = data["transactions"]
     if not clients or not transactions:
@@ -41,6 +49,8 @@ def analyze_demographics(data: dict[str, list[dict[str, Any]]]) -> dict:
     male_spending = merged.loc[merged["sex"] == "Male", "totalPrice"].dropna()
     female_spending = merged.loc[merged["sex"] == "Female", "totalPrice"].dropna()
     if len(male_spending) > 0 and len(female_spending) > 0:
+        from scipy import stats  # deferred: scipy.stats is slow to import
+
         stat, pvalue = stats.mannwhitneyu(male_spending, female_spending, alternative="two-sided")
         mann_whitney_result = {
             "statistic": float(stat),
@@ -64,6 +74,15 @@ def analyze_demographics(data: dict[str, list[dict[str, Any]]]) -> dict:
         .to_dict()
     )
 
+    # Batched significance: bootstrap CIs and all pairwise segment comparisons
+    significance_key = "demographics:" + snapshot_hash(merged, ["totalPrice", "sex", "age_group", "city"])
+    significance = cached(significance_key, lambda: {
+        "mean_spending_ci_by_sex": grouped_confidence_intervals(merged, "sex", "totalPrice", method="normal"),
+        "mean_spending_ci_by_age_group": grouped_confidence_intervals(merged, "age_group", "totalPrice", method="normal"),
+        "pairwise_age_group_spending": pairwise_mannwhitney(merged, "age_group", "totalPrice"),
+        "pairwise_city_spending": pairwise_mannwhitney(merged, "city", "totalPrice"),
+    })
+
     # Repeat purchase behaviour
     client_tx_counts = trans_df.groupby("clientId").size()
     repeat_customers = int((client_tx_counts > 1).sum())
@@ -72,6 +91,7 @@ def analyze_demographics(data: dict[str, list[dict[str, Any]]]) -> dict:
     return {
         "spending_by_sex": spending_by_sex,
         "mann_whitney_sex_spending": mann_whitney_result,
+        "significance": significance,
         "spending_by_age_group": spending_by_age,
         "top_cities_by_spending": top_cities,
         "repeat_customers": repeat_customers,
@@ -3,7 +3,8 @@ from collections import Counter
 from itertools import combinations
 
 import pandas as pd
-from scipy import stats
+
+from .significance import bootstrap_pearson_ci, cached, snapshot_hash
 
 def _rows(payload):
     if isinstance(payload, dict):
@@ -83,11 +84,16 @@ def analyze_products(data: dict[str, list[dict[str, Any]]]) -> dict:
     # Pearson correlation: price vs quantity sold
     correlation_result = None
     if len(products_df) > 2:
+        from scipy import stats  # deferred: scipy.stats is slow to import
+
         product_qty = qty_by_product.reindex(products_df["_id"], fill_value=0)
         r, p = stats.pearsonr(products_df["price"].values, product_qty.values)
+        pairs = pd.DataFrame({"price": products_df["price"].values, "quantity": product_qty.values})
+        ci_key = "products:" + snapshot_hash(pairs, ["price", "quantity"])
         correlation_result = {
             "pearson_r": round(float(r), 4),
             "p_value": round(float(p), 4),
+            "bootstrap_ci": cached(ci_key, lambda: bootstrap_pearson_ci(pairs["price"], pairs["quantity"])),
             "interpretation": (
                 "significant negative" if p < 0.05 and r < 0
                 else "significant positive" if p < 0.05 and r > 0
@@ -2,9 +2,17 @@ from typing import Any
 
 import pandas as pd
 
+from .streaming import StreamingAnalytics
 
-def analyze_returns(data: dict[str, list[dict[str, Any]]]) -> dict:
+
+def analyze_returns(
+    data: dict[str, list[dict[str, Any]]],
+    approximate: StreamingAnalytics | None = None,
+) -> dict:
     """Analyze return reason distribution, rates by product and demographics."""
+    if approximate is not None:
+        return approximate.returns_report()
+
     returns = data["returns"]
     orders = data["orders"]
     transactions = data["transactions"]
@@ -0,0 +1,323 @@
+"""Batched significance testing and confidence intervals.
+
+Everything here is plain NumPy: bootstrap resamples are drawn as index matrices
+(in bounded chunks) and reduced along an axis, and Mann-Whitney U statistics
+come from binary searches over pre-sorted groups, so adding comparisons does
+not mean another full pass through scipy per test. Results are cached by a hash
+of the input columns, so repeated calls on an unchanged snapshot are free.
+
+Mean intervals are analytic (normal approximation). Bootstrap intervals are
+drawn from at most BOOTSTRAP_MAX_ROWS rows and rescaled to the full sample size
+(m-out-of-n bootstrap), and rank tests use at most MAX_ROWS rows per group. Both
+caps can be overridden per call with `max_rows`; None disables subsampling.
+
+The normal approximation for Mann-Whitney U is poor for small samples, so pairs
+of at most EXACT_MAX_ROWS combined rows get an exact p-value instead, and groups
+under MIN_GROUP_SIZE rows are not tested at all.
+"""
+import hashlib
+import math
+from collections import OrderedDict
+from itertools import combinations
+from statistics import NormalDist
+from typing import Any, Callable, Iterator
+
+import numpy as np
+import pandas as pd
+
+BOOTSTRAP_RESAMPLES = 1000
+CONFIDENCE = 0.95
+ALPHA = 0.05
+MAX_ROWS = 50_000  # per-group cap for rank tests
+BOOTSTRAP_MAX_ROWS = 5_000  # cap for the rows each bootstrap resample draws from
+MAX_GROUPS = 12  # caps pairwise comparisons at MAX_GROUPS * (MAX_GROUPS - 1) / 2
+MIN_GROUP_SIZE = 5  # smaller groups are left out of rank tests
+EXACT_MAX_ROWS = 40  # pairs up to this many combined rows get exact p-values
+PERMUTATIONS = 9_999  # resamples for the tied small-sample permutation test
+CACHE_SIZE = 64
+_CHUNK_CELLS = 5_000_000  # max resample-matrix cells held in memory at once
+
+_cache: OrderedDict[str, Any] = OrderedDict()
+
+
+def snapshot_hash(df: pd.DataFrame, columns: list[str]) -> str:
+    """Content hash of `columns` of `df`, used as a cache key."""
+    hashed = pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+    return hashlib.blake2b(hashed.tobytes(), digest_size=16).hexdigest()
+
+
+def cached(key: str, compute: Callable[[], Any]) -> Any:
+    """Return the cached result for `key`, computing and storing it on a miss (LRU)."""
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+    result = compute()
+    _cache[key] = result
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return result
+
+
+def _rng() -> np.random.Generator:
+    # Fixed seed: identical inputs give identical intervals.
+    return np.random.default_rng(0)
+
+
+def _clean(values: Any) -> np.ndarray:
+    values = np.asarray(values, dtype=float)
+    return values[~np.isnan(values)]
+
+
+def _subsample(values: np.ndarray, rng: np.random.Generator, max_rows: int | None) -> np.ndarray:
+    if max_rows is None or len(values) <= max_rows:
+        return values
+    return values[rng.choice(len(values), size=max_rows, replace=False)]
+
+
+def _resample_indices(n: int, n_resamples: int, rng: np.random.Generator) -> Iterator[np.ndarray]:
+    chunk = max(1, _CHUNK_CELLS // max(n, 1))
+    for start in range(0, n_resamples, chunk):
+        yield rng.integers(0, n, size=(min(chunk, n_resamples - start), n))
+
+
+def _interval(
+    estimates: np.ndarray, sample_estimate: float, estimate: float, scale: float, confidence: float
+) -> tuple[float, float]:
+    """Percentile interval of bootstrap `estimates` around `sample_estimate`,
+    shrunk by `scale` (sqrt(m / n) when resampling m of n rows) and recentred
+    on the full-data `estimate`."""
+    tail = (1 - confidence) / 2
+    with np.errstate(invalid="ignore"):
+        low, high = np.nanquantile(estimates, [tail, 1 - tail])
+    return (
+        estimate + (float(low) - sample_estimate) * scale,
+        estimate + (float(high) - sample_estimate) * scale,
+    )
+
+
+def confidence_interval(
+    values: Any,
+    statistic: str = "mean",
+    method: str | None = None,
+    n_resamples: int = BOOTSTRAP_RESAMPLES,
+    confidence: float = CONFIDENCE,
+    max_rows: int | None = BOOTSTRAP_MAX_ROWS,
+) -> dict | None:
+    """Confidence interval for the mean or median of `values`. `method` is
+    "normal" (analytic, mean only) or "bootstrap"; by default means use "normal"
+    and medians "bootstrap". The result records the method used."""
+    if statistic not in ("mean", "median"):
+        raise ValueError(f"Unknown statistic: {statistic!r}")
+    method = method or ("normal" if statistic == "mean" else "bootstrap")
+    if method == "normal" and statistic != "mean":
+        raise ValueError("The normal interval is only available for the mean")
+    if method not in ("normal", "bootstrap"):
+        raise ValueError(f"Unknown method: {method!r}")
+
+    values = _clean(values)
+    if len(values) == 0:
+        return None
+
+    func = {"mean": np.mean, "median": np.median}[statistic]
+    estimate = float(func(values))
+    if method == "normal":
+        half_width = 0.0
+        if len(values) > 1:
+            z = NormalDist().inv_cdf((1 + confidence) / 2)
+            half_width = z * float(np.std(values, ddof=1)) / math.sqrt(len(values))
+        low, high = estimate - half_width, estimate + half_width
+        sample_size = len(values)
+    else:
+        rng = _rng()
+        sample = _subsample(values, rng, max_rows)
+        estimates = np.concatenate([
+            func(sample[idx], axis=1)
+            for idx in _resample_indices(len(sample), n_resamples, rng)
+        ])
+        scale = math.sqrt(len(sample) / len(values))
+        low, high = _interval(estimates, float(func(sample)), estimate, scale, confidence)
+        sample_size = len(sample)
+
+    return {
+        "statistic": statistic,
+        "method": method,
+        "estimate": round(estimate, 4),
+        "ci_low": round(low, 4),
+        "ci_high": round(high, 4),
+        "confidence": confidence,
+        "n": int(len(values)),
+        "resampled_n": int(sample_size),
+    }
+
+
+def grouped_confidence_intervals(
+    df: pd.DataFrame,
+    group_col: str,
+    value_col: str,
+    statistic: str = "mean",
+    method: str | None = None,
+    max_groups: int = MAX_GROUPS,
+    max_rows: int | None = BOOTSTRAP_MAX_ROWS,
+) -> dict[str, dict]:
+    """confidence_interval for each of the `max_groups` largest groups."""
+    groups = df.groupby(group_col, observed=True)[value_col]
+    largest = groups.size().sort_values(ascending=False).head(max_groups).index
+    result = {}
+    for name in largest:
+        ci = confidence_interval(groups.get_group(name), statistic, method, max_rows=max_rows)
+        if ci is not None:
+            result[str(name)] = ci
+    return result
+
+
+def _pearson(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Row-wise Pearson's r of two (resamples, n) matrices; nan where undefined."""
+    xs = x - x.mean(axis=-1, keepdims=True)
+    ys = y - y.mean(axis=-1, keepdims=True)
+    denom = np.sqrt((xs ** 2).sum(axis=-1) * (ys ** 2).sum(axis=-1))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (xs * ys).sum(axis=-1) / denom
+
+
+def bootstrap_pearson_ci(
+    x: Any,
+    y: Any,
+    n_resamples: int = BOOTSTRAP_RESAMPLES,
+    confidence: float = CONFIDENCE,
+    max_rows: int | None = BOOTSTRAP_MAX_ROWS,
+) -> dict | None:
+    """Percentile bootstrap interval for Pearson's r, resampling (x, y) pairs.
+    None when r is undefined (fewer than 3 pairs or a constant column)."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    mask = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[mask], y[mask]
+    if len(x) < 3:
+        return None
+    r = float(_pearson(x, y))
+    if math.isnan(r):
+        return None
+
+    rng = _rng()
+    n = len(x)
+    if max_rows is not None and n > max_rows:
+        keep = rng.choice(n, size=max_rows, replace=False)
+        x, y = x[keep], y[keep]
+
+    estimates = np.concatenate([
+        _pearson(x[idx], y[idx]) for idx in _resample_indices(len(x), n_resamples, rng)
+    ])
+    sample_r = float(_pearson(x, y))
+    if math.isnan(sample_r):
+        return None
+    low, high = _interval(estimates, sample_r, r, math.sqrt(len(x) / n), confidence)
+    if math.isnan(low) or math.isnan(high):
+        return None
+    return {
+        "ci_low": round(max(low, -1.0), 4),
+        "ci_high": round(min(high, 1.0), 4),
+        "confidence": confidence,
+    }
+
+
+def _mann_whitney(x: np.ndarray, y: np.ndarray) -> tuple[float, float]:
+    """U statistic of x and two-sided p-value (normal approximation with tie and
+    continuity correction). Both inputs must be sorted."""
+    n1, n2 = len(x), len(y)
+    left = np.searchsorted(y, x, side="left")
+    right = np.searchsorted(y, x, side="right")
+    u = float(np.sum(left + 0.5 * (right - left)))
+
+    n = n1 + n2
+    _, counts = np.unique(np.concatenate([x, y]), return_counts=True)
+    tie_term = float(np.sum(counts.astype(float) ** 3 - counts)) / (n * (n - 1)) if n > 1 else 0.0
+    sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term))
+    if sigma == 0:
+        return u, 1.0
+    z = max(abs(u - n1 * n2 / 2) - 0.5, 0.0) / sigma
+    return u, math.erfc(z / math.sqrt(2))
+
+
+def _small_sample_pvalue(x: np.ndarray, y: np.ndarray, rng: np.random.Generator) -> tuple[float, str]:
+    """Two-sided Mann-Whitney p-value for small samples: the exact U distribution
+    when there are no ties, else a permutation test on average ranks."""
+    from scipy import stats  # deferred: scipy.stats is slow to import
+
+    combined = np.concatenate([x, y])
+    if len(np.unique(combined)) == len(combined):
+        return float(stats.mannwhitneyu(x, y, method="exact").pvalue), "exact"
+
+    n1 = len(x)
+    ranks = stats.rankdata(combined)
+    observed = ranks[:n1].sum()
+    permuted = rng.permuted(np.tile(ranks, (PERMUTATIONS, 1)), axis=1)[:, :n1].sum(axis=1)
+    # Twice the smaller one-sided p-value, as scipy.stats.permutation_test does.
+    greater = (np.count_nonzero(permuted >= observed - 1e-9) + 1) / (PERMUTATIONS + 1)
+    less = (np.count_nonzero(permuted <= observed + 1e-9) + 1) / (PERMUTATIONS + 1)
+    return min(1.0, 2 * min(greater, less)), "permutation"
+
+
+def _benjamini_hochberg(pvalues: list[float]) -> list[float]:
+    p = np.asarray(pvalues, dtype=float)
+    m = len(p)
+    if m == 0:
+        return []
+    order = np.argsort(p)
+    ranked = p[order] * m / np.arange(1, m + 1)
+    adjusted = np.minimum.accumulate(ranked[::-1])[::-1].clip(max=1.0)
+    result = np.empty(m)
+    result[order] = adjusted
+    return result.tolist()
+
+
+def pairwise_mannwhitney(
+    df: pd.DataFrame,
+    group_col: str,
+    value_col: str,
+    max_groups: int = MAX_GROUPS,
+    max_rows: int | None = MAX_ROWS,
+    min_group_size: int = MIN_GROUP_SIZE,
+) -> dict:
+    """Mann-Whitney U test for every pair among the `max_groups` largest groups
+    with at least `min_group_size` values, with Benjamini-Hochberg adjusted p-values."""
+    groups = df.groupby(group_col, observed=True)[value_col]
+    largest = groups.size().sort_values(ascending=False).head(max_groups).index
+    rng = _rng()
+    samples = {
+        name: np.sort(_subsample(_clean(groups.get_group(name)), rng, max_rows))
+        for name in largest
+    }
+    skipped = [str(name) for name, values in samples.items() if len(values) < min_group_size]
+    samples = {name: values for name, values in samples.items() if len(values) >= min_group_size}
+
+    comparisons = []
+    pvalues = []
+    for a, b in combinations(samples, 2):
+        x, y = samples[a], samples[b]
+        u, p = _mann_whitney(x, y)
+        p_method = "normal"
+        if len(x) + len(y) <= EXACT_MAX_ROWS:
+            p, p_method = _small_sample_pvalue(x, y, rng)
+        pvalues.append(p)
+        comparisons.append({
+            "groups": [str(a), str(b)],
+            "u_statistic": u,
+            "p_value": round(p, 6),
+            "p_method": p_method,
+            # Probability that a random value from the first group exceeds one from the second.
+            "effect_size": round(u / (len(x) * len(y)), 4),
+        })
+
+    for comparison, adjusted in zip(comparisons, _benjamini_hochberg(pvalues)):
+        comparison["p_adjusted"] = round(adjusted, 6)
+        comparison["significant"] = bool(adjusted < ALPHA)
+
+    return {
+        "method": (
+            f"mann-whitney-u (exact up to {EXACT_MAX_ROWS} rows per pair, else normal "
+            "approximation), benjamini-hochberg adjusted"
+        ),
+        "groups_tested": [str(name) for name in samples],
+        "groups_skipped": skipped,
+        "comparisons": comparisons,
+    }
@@ -0,0 +1,183 @@
+"""Fixed-memory, mergeable sketches for approximate analytics on large histories.
+
+- KLLSketch: quantiles/medians with a normalized rank error of ~1.33% at k=200.
+- HyperLogLog: distinct counts with ~0.81% standard error at p=14 (16 KiB).
+- CountMinTopK: (weighted) frequencies and heavy hitters, overestimating by at
+  most e/width of the total weight with probability 1 - e^-depth.
+
+All three are plain NumPy, accept whole pages of values per update, and merge
+with sketches of the same configuration (e.g. built by different workers).
+"""
+import math
+from typing import Any, Iterable
+
+import numpy as np
+import pandas as pd
+
+# 16-byte keys for pd.util.hash_array; one per independent hash function.
+_HASH_KEYS = [f"sketch-hash{i:05d}" for i in range(16)]
+
+
+def _hash64(values: Iterable[Any], seed: int = 0) -> np.ndarray:
+    values = np.asarray([str(v) for v in values], dtype=object)
+    return pd.util.hash_array(values, hash_key=_HASH_KEYS[seed], categorize=False).astype(np.uint64)
+
+
+class KLLSketch:
+    def __init__(self, k: int = 200, seed: int = 0):
+        self.k = k
+        self.n = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._levels: list[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self._levels) - level - 1
+        return max(int(math.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def update(self, values: Iterable[float]) -> None:
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.n += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._levels[0] = np.concatenate([self._levels[0], values])
+        self._compress()
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self._levels):
+            items = self._levels[level]
+            if len(items) >= self._capacity(level):
+                if level + 1 == len(self._levels):
+                    self._levels.append(np.empty(0))
+                items = np.sort(items)
+                # Keep an odd leftover at this level; promote every other item of the rest.
+                leftover, items = items[len(items) - len(items) % 2:], items[:len(items) - len(items) % 2]
+                promoted = items[int(self._rng.integers(0, 2))::2]
+                self._levels[level] = leftover
+                self._levels[level + 1] = np.concatenate([self._levels[level + 1], promoted])
+            level += 1
+
+    def merge(self, other: "KLLSketch") -> None:
+        if other.k != self.k:
+            raise ValueError("Cannot merge KLL sketches with different k")
+        while len(self._levels) < len(other._levels):
+            self._levels.append(np.empty(0))
+        for level, items in enumerate(other._levels):
+            self._levels[level] = np.concatenate([self._levels[level], items])
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+
+    def quantiles(self, qs: Iterable[float]) -> list[float | None]:
+        if self.n == 0:
+            return [None for _ in qs]
+        items = np.concatenate(self._levels)
+        weights = np.concatenate([np.full(len(items), 2 ** level) for level, items in enumerate(self._levels)])
+        order = np.argsort(items, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        ranks = np.searchsorted(cumulative, np.asarray(list(qs)) * cumulative[-1], side="left")
+        values = items[order][np.minimum(ranks, len(items) - 1)]
+        return [float(v) for v in values]
+
+    def quantile(self, q: float) -> float | None:
+        return self.quantiles([q])[0]
+
+    @property
+    def rank_error(self) -> float:
+        """Normalized rank error bound (~99% confidence), per the KLL reference constants."""
+        return 2.296 / self.k ** 0.9723
+
+
+class HyperLogLog:
+    def __init__(self, p: int = 14):
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def update(self, values: Iterable[Any]) -> None:
+        # None, NaN and NaT are missing values, not a distinct item.
+        hashes = _hash64(pd.Series(list(values), dtype=object).dropna())
+        if not len(hashes):
+            return
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - self.p)) - 1)
+        # Position of the leftmost 1-bit in the remaining 64 - p bits.
+        bit_length = np.where(rest > 0, np.frexp(rest.astype(float))[1], 0)
+        rank = (64 - self.p - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        if other.p != self.p:
+            raise ValueError("Cannot merge HyperLogLog sketches with different p")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self) -> int:
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m ** 2 / float(np.sum(np.exp2(-self.registers.astype(float))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * self.m and zeros:
+            estimate = self.m * math.log(self.m / zeros)  # linear counting for small cardinalities
+        return int(round(estimate))
+
+    @property
+    def standard_error(self) -> float:
+        return 1.04 / math.sqrt(self.m)
+
+
+class CountMinTopK:
+    def __init__(self, k: int = 10, width: int = 2048, depth: int = 5):
+        self.k = k
+        self.width = width
+        self.depth = depth
+        self.total = 0.0
+        self.table = np.zeros((depth, width), dtype=float)
+        # Bounded set of heavy-hitter candidates with their latest estimates.
+        self._candidates: dict[str, float] = {}
+
+    def _columns(self, keys: np.ndarray) -> np.ndarray:
+        return np.stack([(_hash64(keys, row) % np.uint64(self.width)).astype(np.int64) for row in range(self.depth)])
+
+    def update(self, values: Iterable[Any], weights: Iterable[float] | None = None) -> None:
+        keys = pd.Series([str(v) for v in values], dtype=object)
+        if keys.empty:
+            return
+        weights = pd.Series(1.0 if weights is None else list(weights), index=keys.index, dtype=float).fillna(0.0)
+        page = weights.groupby(keys.to_numpy()).sum()
+        columns = self._columns(page.index.to_numpy())
+        for row in range(self.depth):
+            np.add.at(self.table[row], columns[row], page.to_numpy())
+        self.total += float(page.sum())
+        self._refresh_candidates(page.index.tolist())
+
+    def _refresh_candidates(self, keys: list[str]) -> None:
+        keys = list(dict.fromkeys([*self._candidates, *keys]))
+        estimates = self.estimate_many(keys)
+        ranked = sorted(zip(keys, estimates), key=lambda item: item[1], reverse=True)
+        self._candidates = dict(ranked[: self.k * 4])
+
+    def estimate_many(self, keys: list[str]) -> list[float]:
+        if not keys:
+            return []
+        columns = self._columns(np.asarray(keys, dtype=object))
+        return self.table[np.arange(self.depth)[:, None], columns].min(axis=0).tolist()
+
+    def merge(self, other: "CountMinTopK") -> None:
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("Cannot merge count-min sketches with different dimensions")
+        self.table += other.table
+        self.total += other.total
+        self._refresh_candidates(list(other._candidates))
+
+    def top(self, k: int | None = None) -> dict[str, float]:
+        return dict(list(self._candidates.items())[: k or self.k])
+
+    @property
+    def error_bound(self) -> float:
+        """Maximum overestimate of any frequency, with probability 1 - e^-depth."""
+        return math.e / self.width * self.total
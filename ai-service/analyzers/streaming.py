@@ -0,0 +1,238 @@
+"""Approximate analytics state, fed page by page from ingestion.
+
+StreamingAnalytics keeps only sketches and counters, so its memory does not grow
+with history length, and two instances (e.g. from different workers or
+different page ranges) combine with merge(). The *_report methods mirror the
+keys of the exact analyzers where the sketches can answer them and report the
+accuracy bounds alongside. The analyze_transactions/demographics/returns
+functions return these reports instead of scanning the full `data` tables when
+given an instance as `approximate` (see convex_client.fetch_sketches).
+"""
+from typing import Any
+
+import pandas as pd
+
+from .sketches import CountMinTopK, HyperLogLog, KLLSketch
+
+AGE_BINS = [0, 25, 35, 45, 55, 65, 100]
+AGE_LABELS = ["18-25", "26-35", "36-45", "46-55", "56-65", "65+"]
+QUANTILES = [0.25, 0.5, 0.75, 0.9, 0.99]
+
+
+class _Segment:
+    """Spending sketch for one demographic segment."""
+
+    def __init__(self):
+        self.values = KLLSketch()
+        self.total = 0.0
+        self.count = 0
+
+    def update(self, values: pd.Series) -> None:
+        values = values.dropna()
+        self.values.update(values.to_numpy())
+        self.total += float(values.sum())
+        self.count += len(values)
+
+    def merge(self, other: "_Segment") -> None:
+        self.values.merge(other.values)
+        self.total += other.total
+        self.count += other.count
+
+    def report(self) -> dict:
+        return {
+            "mean": round(self.total / self.count, 2) if self.count else 0,
+            "median": self.values.quantile(0.5),
+            "sum": round(self.total, 2),
+            "count": self.count,
+        }
+
+
+class StreamingAnalytics:
+    def __init__(self, clients: list[dict[str, Any]] | None = None):
+        """`clients` is the (small) reference table used to attach sex, city and
+        age group to streamed transactions."""
+        self._clients = self._client_segments(clients or [])
+
+        self.transactions = 0
+        self.order_value = KLLSketch()
+        self.order_value_total = 0.0
+        self.status = CountMinTopK(k=10)
+        self.customers = HyperLogLog()
+        self.discounted = {"count": 0, "completed": 0, "value": 0.0}
+        self.non_discounted = {"count": 0, "completed": 0, "value": 0.0}
+        self.cancelled = {"count": 0, "value": 0.0}
+
+        self.orders = 0
+        self.order_transactions = HyperLogLog()
+
+        self.by_sex: dict[str, _Segment] = {}
+        self.by_age_group: dict[str, _Segment] = {}
+        self.city_spending = CountMinTopK(k=10)
+
+        self.returns = 0
+        self.return_reasons = CountMinTopK(k=10)
+
+    @staticmethod
+    def _client_segments(clients: list[dict[str, Any]]) -> pd.DataFrame:
+        if not clients:
+            return pd.DataFrame(columns=["sex", "city", "age_group"])
+        df = pd.DataFrame(clients).set_index("_id")
+        df["city"] = df["address"].apply(
+            lambda a: a.get("city", "Unknown") if isinstance(a, dict) else "Unknown"
+        )
+        birth = pd.to_datetime(df["birthDate"], errors="coerce", utc=True, format="mixed")
+        age = ((pd.Timestamp.now(tz="UTC") - birth).dt.days / 365.25).fillna(0).astype(int)
+        df["age_group"] = pd.cut(age, bins=AGE_BINS, labels=AGE_LABELS).astype(object)
+        return df[["sex", "city", "age_group"]]
+
+    def update(self, table: str, rows: list[dict[str, Any]]) -> "StreamingAnalytics":
+        """Absorb one page of `table` rows. Returns self, so the call can run in a
+        process pool and hand back the updated state."""
+        if rows:
+            handler = getattr(self, f"_update_{table}", None)
+            if handler is not None:
+                handler(pd.DataFrame(rows))
+        return self
+
+    def _update_transactions(self, df: pd.DataFrame) -> None:
+        price = pd.to_numeric(df["totalPrice"], errors="coerce")
+        self.transactions += len(df)
+        self.order_value.update(price.to_numpy())
+        self.order_value_total += float(price.sum())
+        self.status.update(df["status"])
+        self.customers.update(df["clientId"])
+
+        has_discount = df["discount"] > 0
+        completed = df["status"] == "completed"
+        for bucket, mask in ((self.discounted, has_discount), (self.non_discounted, ~has_discount)):
+            bucket["count"] += int(mask.sum())
+            bucket["completed"] += int((completed & mask).sum())
+            bucket["value"] += float(price[mask].sum())
+        cancelled = df["status"] == "cancelled"
+        self.cancelled["count"] += int(cancelled.sum())
+        self.cancelled["value"] += float(price[cancelled].sum())
+
+        segments = self._clients.reindex(df["clientId"].to_numpy())
+        segments["totalPrice"] = price.to_numpy()
+        for column, target in (("sex", self.by_sex), ("age_group", self.by_age_group)):
+            for name, group in segments.groupby(column):
+                target.setdefault(str(name), _Segment()).update(group["totalPrice"])
+        known_city = segments["city"].notna()
+        self.city_spending.update(segments.loc[known_city, "city"], segments.loc[known_city, "totalPrice"])
+
+    def _update_orders(self, df: pd.DataFrame) -> None:
+        self.orders += len(df)
+        self.order_transactions.update(df["transactionId"])
+
+    def _update_returns(self, df: pd.DataFrame) -> None:
+        self.returns += len(df)
+        self.return_reasons.update(df["reason"])
+
+    def merge(self, other: "StreamingAnalytics") -> "StreamingAnalytics":
+        """Fold `other` (same configuration, disjoint pages) into this instance."""
+        self.transactions += other.transactions
+        self.order_value.merge(other.order_value)
+        self.order_value_total += other.order_value_total
+        self.status.merge(other.status)
+        self.customers.merge(other.customers)
+        for mine, theirs in (
+            (self.discounted, other.discounted),
+            (self.non_discounted, other.non_discounted),
+            (self.cancelled, other.cancelled),
+        ):
+            for key in mine:
+                mine[key] += theirs[key]
+
+        self.orders += other.orders
+        self.order_transactions.merge(other.order_transactions)
+
+        for mine, theirs in ((self.by_sex, other.by_sex), (self.by_age_group, other.by_age_group)):
+            for name, segment in theirs.items():
+                if name in mine:
+                    mine[name].merge(segment)
+                else:
+                    mine[name] = segment
+        self.city_spending.merge(other.city_spending)
+
+        self.returns += other.returns
+        self.return_reasons.merge(other.return_reasons)
+        return self
+
+    def transactions_report(self) -> dict:
+        if not self.transactions or not self.orders:
+            return {"error": "Insufficient data for transaction analysis"}
+
+        def _rates(bucket: dict) -> tuple[float, float]:
+            if not bucket["count"]:
+                return 0, 0
+            return round(bucket["value"] / bucket["count"], 2), round(bucket["completed"] / bucket["count"], 4)
+
+        avg_discounted, completion_discounted = _rates(self.discounted)
+        avg_non_discounted, completion_non_discounted = _rates(self.non_discounted)
+        distinct_transactions = max(self.order_transactions.count(), 1)
+        return {
+            "approximate": True,
+            "avg_basket_size": round(self.orders / distinct_transactions, 2),
+            "avg_order_value": round(self.order_value_total / self.transactions, 2),
+            "median_order_value": self.order_value.quantile(0.5),
+            "order_value_percentiles": dict(zip(map(str, QUANTILES), self.order_value.quantiles(QUANTILES))),
+            "status_distribution": {k: int(v) for k, v in self.status.top().items()},
+            "discount_stats": {
+                "discounted_count": self.discounted["count"],
+                "non_discounted_count": self.non_discounted["count"],
+                "avg_value_discounted": avg_discounted,
+                "avg_value_non_discounted": avg_non_discounted,
+                "completion_rate_discounted": completion_discounted,
+                "completion_rate_non_discounted": completion_non_discounted,
+            },
+            "cancellation_analysis": {
+                "total_cancelled": self.cancelled["count"],
+                "cancellation_rate": round(self.cancelled["count"] / self.transactions, 4),
+                "avg_cancelled_value": round(self.cancelled["value"] / self.cancelled["count"], 2) if self.cancelled["count"] else 0,
+            },
+            "total_transactions": self.transactions,
+            "accuracy": {
+                "order_value_rank_error": round(self.order_value.rank_error, 4),
+                "avg_basket_size_relative_error": round(self.order_transactions.standard_error, 4),
+                "status_count_max_overestimate": round(self.status.error_bound, 2),
+            },
+        }
+
+    def demographics_report(self) -> dict:
+        if not self.transactions or self._clients.empty:
+            return {"error": "Insufficient data for demographics analysis"}
+
+        def _segments(segments: dict[str, _Segment]) -> dict:
+            reports = {name: segment.report() for name, segment in segments.items()}
+            return {stat: {name: r[stat] for name, r in reports.items()} for stat in ("mean", "median", "sum", "count")}
+
+        segment_sketches = [s.values for s in (*self.by_sex.values(), *self.by_age_group.values())]
+        median_rank_error = max((sketch.rank_error for sketch in segment_sketches), default=0.0)
+
+        return {
+            "approximate": True,
+            "spending_by_sex": _segments(self.by_sex),
+            "spending_by_age_group": _segments(self.by_age_group),
+            "top_cities_by_spending": {k: round(v, 2) for k, v in self.city_spending.top().items()},
+            "total_unique_customers": self.customers.count(),
+            "accuracy": {
+                "median_rank_error": round(median_rank_error, 4),
+                "unique_customers_relative_error": round(self.customers.standard_error, 4),
+                "city_spending_max_overestimate": round(self.city_spending.error_bound, 2),
+            },
+        }
+
+    def returns_report(self) -> dict:
+        if not self.returns:
+            return {"error": "No returns data available", "total_returns": 0}
+        total_orders = self.orders or 1
+        return {
+            "approximate": True,
+            "reason_distribution": {k: int(v) for k, v in self.return_reasons.top().items()},
+            "overall_return_rate": round(self.returns / total_orders, 4),
+            "total_returns": self.returns,
+            "total_orders": total_orders,
+            "accuracy": {
+                "reason_count_max_overestimate": round(self.return_reasons.error_bound, 2),
+            },
+        }
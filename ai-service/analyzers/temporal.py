@@ -2,36 +2,50 @@ from typing import Any
 
 import pandas as pd
 
+from .significance import cached, snapshot_hash
+from .time_index import TimeIndex, TimeLike
 
-def analyze_temporal(data: dict[str, list[dict[str, Any]]]) -> dict:
-    """Analyze temporal patterns across transactions and orders."""
+DAYS_OF_WEEK = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def _build_index(df: pd.DataFrame) -> TimeIndex:
+    created = pd.to_datetime(df["date"], format="mixed", utc=True)
+    return TimeIndex(
+        created,
+        categories={
+            "day_of_week": created.dt.day_name(),
+            "hour": created.dt.hour,
+            "month": created.dt.strftime("%Y-%m"),
+        },
+    )
+
+
+def analyze_temporal(
+    data: dict[str, list[dict[str, Any]]],
+    since: TimeLike = None,
+    until: TimeLike = None,
+) -> dict:
+    """Analyze temporal patterns across transactions and orders, optionally
+    restricted to the [since, until) range."""
     transactions = data["transactions"]
     if not transactions:
         return {"error": "No transactions data available"}
 
     df = pd.DataFrame(transactions)
-    df["created"] = pd.to_datetime(df["date"], format="mixed", utc=True)
-
-    day_of_week = (
-        df["created"]
-        .dt.day_name()
-        .value_counts()
-        .reindex(
-            ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"],
-            fill_value=0,
-        )
-        .to_dict()
-    )
+    # The sorted index is built once per snapshot; windowed calls only binary-search it.
+    index = cached("temporal:" + snapshot_hash(df, ["date"]), lambda: _build_index(df))
+
+    day_of_week = index.counts_by("day_of_week", since, until)
+    day_of_week = {day: day_of_week.get(day, 0) for day in DAYS_OF_WEEK}
 
-    hourly = df["created"].dt.hour.value_counts().sort_index().to_dict()
-    hourly = {str(k): int(v) for k, v in hourly.items()}
+    hourly = index.counts_by("hour", since, until)
+    hourly = dict(sorted(hourly.items(), key=lambda item: int(item[0])))
 
-    monthly = df["created"].dt.strftime("%Y-%m").value_counts().sort_index().to_dict()
+    monthly = dict(sorted(index.counts_by("month", since, until).items()))
 
     return {
         "transactions_by_day_of_week": day_of_week,
         "transactions_by_hour": hourly,
         "transactions_by_month": monthly,
-        "total_transactions": len(df),
+        "total_transactions": index.count(since, until),
     }
- 
\ No newline at end of file
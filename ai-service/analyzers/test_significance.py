@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from analyzers.significance import (
+    bootstrap_pearson_ci,
+    confidence_interval,
+    grouped_confidence_intervals,
+    pairwise_mannwhitney,
+)
+
+
+def _frame(groups: dict[str, list[float]]) -> pd.DataFrame:
+    return pd.DataFrame(
+        [(name, value) for name, values in groups.items() for value in values],
+        columns=["group", "value"],
+    )
+
+
+def test_small_groups_get_exact_pvalues():
+    x, y = [1.5, 2.5, 3.5, 4.5, 5.5], [2.0, 6.0, 7.0, 8.0, 9.0, 10.0]
+    result = pairwise_mannwhitney(_frame({"b": y, "a": x}), "group", "value")
+    (comparison,) = result["comparisons"]
+    expected = stats.mannwhitneyu(y, x, method="exact").pvalue
+    assert comparison["p_method"] == "exact"
+    assert comparison["p_value"] == pytest.approx(expected, abs=1e-6)
+
+
+def test_small_tied_groups_use_permutation_test():
+    x, y = [1, 1, 2, 2, 3, 3], [2, 3, 3, 4, 4, 5, 5]
+    result = pairwise_mannwhitney(_frame({"b": y, "a": x}), "group", "value")
+    (comparison,) = result["comparisons"]
+    expected = stats.permutation_test(
+        (y, x), lambda a, b: stats.mannwhitneyu(a, b).statistic, n_resamples=np.inf
+    ).pvalue
+    assert comparison["p_method"] == "permutation"
+    assert comparison["p_value"] == pytest.approx(expected, abs=0.01)
+
+
+def test_groups_below_min_size_are_skipped():
+    result = pairwise_mannwhitney(_frame({"a": [1, 2, 3, 4, 5], "b": [6]}), "group", "value")
+    assert result["groups_tested"] == ["a"]
+    assert result["groups_skipped"] == ["b"]
+    assert result["comparisons"] == []
+
+
+def test_large_groups_match_scipy_asymptotic():
+    rng = np.random.default_rng(0)
+    groups = {
+        "a": rng.normal(0.0, 1, 300).round(1),  # rounding adds ties
+        "b": rng.normal(0.2, 1, 250).round(1),
+        "c": rng.normal(0.0, 1, 200).round(1),
+    }
+    result = pairwise_mannwhitney(_frame(groups), "group", "value")
+    for comparison in result["comparisons"]:
+        a, b = comparison["groups"]
+        expected = stats.mannwhitneyu(groups[a], groups[b], method="asymptotic")
+        assert comparison["p_method"] == "normal"
+        assert comparison["u_statistic"] == pytest.approx(expected.statistic)
+        assert comparison["p_value"] == pytest.approx(expected.pvalue, abs=1e-6)
+
+
+def test_adjusted_pvalues_match_scipy_fdr():
+    rng = np.random.default_rng(1)
+    groups = {name: rng.normal(shift, 1, 100) for name, shift in zip("abcdef", [0, 0, 0.1, 0.3, 0.5, 0.5])}
+    result = pairwise_mannwhitney(_frame(groups), "group", "value")
+    raw = np.array([c["p_value"] for c in result["comparisons"]])
+    adjusted = np.array([c["p_adjusted"] for c in result["comparisons"]])
+    assert adjusted == pytest.approx(stats.false_discovery_control(raw, method="bh"), abs=1e-5)
+
+
+def test_normal_and_bootstrap_mean_intervals_agree():
+    values = np.random.default_rng(2).lognormal(3, 1, 20_000)
+    normal = confidence_interval(values, "mean")
+    bootstrap = confidence_interval(values, "mean", method="bootstrap")
+    assert (normal["method"], bootstrap["method"]) == ("normal", "bootstrap")
+    half_width = (normal["ci_high"] - normal["ci_low"]) / 2
+    assert bootstrap["ci_low"] == pytest.approx(normal["ci_low"], abs=0.2 * half_width)
+    assert bootstrap["ci_high"] == pytest.approx(normal["ci_high"], abs=0.2 * half_width)
+    with pytest.raises(ValueError):
+        confidence_interval(values, "median", method="normal")
+
+
+def test_grouped_intervals_record_method():
+    df = _frame({"a": list(range(50)), "b": list(range(10, 40))})
+    result = grouped_confidence_intervals(df, "group", "value", method="normal")
+    assert set(result) == {"a", "b"}
+    assert {ci["method"] for ci in result.values()} == {"normal"}
+    assert result["a"]["estimate"] == 24.5
+
+
+def test_pearson_ci_is_none_for_constant_input():
+    assert bootstrap_pearson_ci([1, 1, 1, 1], [1, 2, 3, 4]) is None
+    ci = bootstrap_pearson_ci(np.arange(100), np.arange(100) + np.random.default_rng(3).normal(0, 5, 100))
+    assert -1 <= ci["ci_low"] <= ci["ci_high"] <= 1
@@ -0,0 +1,82 @@
+import math
+
+import numpy as np
+
+from analyzers.sketches import CountMinTopK, HyperLogLog, KLLSketch
+
+
+def _rank(values: np.ndarray, x: float) -> float:
+    return np.searchsorted(np.sort(values), x, side="right") / len(values)
+
+
+def test_kll_quantiles_within_rank_error():
+    values = np.random.default_rng(1).lognormal(3, 1, 200_000)
+    sketch = KLLSketch()
+    for page in np.array_split(values, 40):
+        sketch.update(page)
+    assert sketch.n == len(values)
+    for q, estimate in zip([0.1, 0.5, 0.9, 0.99], sketch.quantiles([0.1, 0.5, 0.9, 0.99])):
+        assert abs(_rank(values, estimate) - q) <= sketch.rank_error
+
+
+def test_kll_merge_matches_single_sketch_accuracy():
+    values = np.random.default_rng(2).normal(size=100_000)
+    left, right = KLLSketch(), KLLSketch()
+    left.update(values[:30_000])
+    right.update(values[30_000:])
+    left.merge(right)
+    assert left.n == len(values)
+    assert (left.min, left.max) == (values.min(), values.max())
+    assert abs(_rank(values, left.quantile(0.5)) - 0.5) <= left.rank_error
+
+
+def test_kll_ignores_nan_and_empty():
+    sketch = KLLSketch()
+    assert sketch.quantile(0.5) is None
+    sketch.update([float("nan"), 1.0, 2.0, 3.0])
+    assert sketch.n == 3
+    assert sketch.quantile(0.5) == 2.0
+
+
+def test_hll_count_within_standard_error():
+    sketch = HyperLogLog()
+    for start in range(0, 100_000, 10_000):
+        sketch.update(f"client-{i}" for i in range(start, start + 10_000))
+    # 4 standard errors: fails with probability well under 0.01%.
+    assert abs(sketch.count() - 100_000) / 100_000 <= 4 * sketch.standard_error
+
+
+def test_hll_merge_counts_union_once():
+    left, right = HyperLogLog(), HyperLogLog()
+    left.update(f"id-{i}" for i in range(0, 60_000))
+    right.update(f"id-{i}" for i in range(40_000, 100_000))
+    left.merge(right)
+    assert abs(left.count() - 100_000) / 100_000 <= 4 * left.standard_error
+
+
+def test_hll_drops_missing_values():
+    sketch = HyperLogLog()
+    sketch.update([None, float("nan"), np.nan, "a", "b", "a"])
+    assert sketch.count() == 2
+
+
+def test_count_min_never_underestimates_and_stays_within_bound():
+    rng = np.random.default_rng(3)
+    keys = rng.zipf(1.5, 50_000) % 5_000
+    sketch = CountMinTopK(k=5)
+    for page in np.array_split(keys, 10):
+        sketch.update(page)
+    uniques, exact = np.unique(keys, return_counts=True)
+    estimates = np.array(sketch.estimate_many([str(k) for k in uniques]))
+    assert (estimates >= exact).all()
+    assert (estimates - exact).max() <= sketch.error_bound
+    assert list(sketch.top()) == [str(k) for k in uniques[np.argsort(-exact)][:5]]
+
+
+def test_count_min_merge_adds_weights():
+    left, right = CountMinTopK(k=2), CountMinTopK(k=2)
+    left.update(["a", "b", "a"], weights=[10.0, 1.0, 5.0])
+    right.update(["b", "c"], weights=[20.0, 2.0])
+    left.merge(right)
+    assert math.isclose(left.total, 38.0)
+    assert left.top() == {"b": 21.0, "a": 15.0}
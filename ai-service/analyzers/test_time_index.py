@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta, timezone
+
+from analyzers.time_index import TimeIndex
+
+RECORDS = [
+    {"at": "2024-01-01T00:00:00Z", "severity": 1, "type": "Avalanche"},
+    {"at": "2024-01-01T12:00:00Z", "severity": 3.0, "type": "Avalanche"},
+    {"at": "2024-01-02T00:00:00Z", "severity": None, "type": "Missing Person"},
+    {"at": "2024-01-03T00:00:00Z", "severity": 5, "type": None},
+    {"at": "not a date", "severity": 4, "type": "Avalanche"},
+]
+
+
+def make_index() -> TimeIndex:
+    return TimeIndex.from_records(RECORDS, "at", ("severity",), ("severity", "type"))
+
+
+def test_unparseable_timestamps_are_dropped():
+    index = make_index()
+    assert len(index) == 4
+    assert index.first == "2024-01-01T00:00:00+00:00"
+    assert index.last == "2024-01-03T00:00:00+00:00"
+
+
+def test_bounds_are_half_open():
+    index = make_index()
+    assert index.count("2024-01-01T12:00:00Z", "2024-01-02T00:00:00Z") == 1
+    assert index.count("2024-01-01T12:00:00Z", "2024-01-02T00:00:01Z") == 2
+    assert index.count(since="2024-01-02") == 2
+    assert index.count(until="2024-01-01T12:00:00Z") == 1
+    assert index.count("2024-01-03", "2024-01-01") == 0
+
+
+def test_naive_datetimes_are_utc():
+    index = make_index()
+    naive = datetime(2024, 1, 2)
+    aware = datetime(2024, 1, 2, tzinfo=timezone.utc)
+    assert index.count(since=naive) == index.count(since=aware) == 2
+
+
+def test_sum_and_mean_skip_missing_values():
+    index = make_index()
+    assert index.sum("severity") == 9.0
+    assert index.mean("severity") == 3.0
+    assert index.mean("severity", "2024-01-02", "2024-01-03") is None
+
+
+def test_counts_by_labels_and_range():
+    index = make_index()
+    assert index.counts_by("type") == {"Avalanche": 2, "Missing Person": 1}
+    assert index.counts_by("type", since="2024-01-01T06:00:00Z") == {"Avalanche": 1, "Missing Person": 1}
+    assert index.counts_by("severity") == {"1": 1, "3": 1, "5": 1}
+    assert index.counts_by("type", "2024-01-05", "2024-01-06") == {}
+
+
+def test_rolling_counts_window_edges():
+    index = make_index()
+    points = index.rolling_counts(timedelta(days=1), timedelta(days=1), until="2024-01-03T00:00:00Z")
+    # Windows are [end - 1d, end): the record at 01-03T00:00 is excluded, the one
+    # at 01-02T00:00 starts the last window.
+    assert points[-1] == {"end": "2024-01-03T00:00:00+00:00", "count": 1}
+    assert points[-2] == {"end": "2024-01-02T00:00:00+00:00", "count": 2}
+
+
+def test_rolling_counts_anchor_to_until_past_last_record():
+    index = make_index()
+    points = index.rolling_counts(
+        timedelta(days=1), timedelta(days=1), since="2024-01-01", until="2024-01-10"
+    )
+    assert points[-1] == {"end": "2024-01-10T00:00:00+00:00", "count": 0}
+    assert points[0]["end"] == "2024-01-02T00:00:00+00:00"
+    assert len(points) == 9
+
+
+def test_rolling_counts_default_end_includes_last_record():
+    index = make_index()
+    points = index.rolling_counts(timedelta(days=1), timedelta(hours=12))
+    assert points[-1]["count"] == 1
+    assert len(points) == 3
+
+
+def test_rolling_counts_keeps_most_recent_points():
+    index = make_index()
+    points = index.rolling_counts(
+        timedelta(hours=1), timedelta(hours=1), since="2024-01-01", until="2024-01-10", max_points=5
+    )
+    assert points[-1]["end"] == "2024-01-10T00:00:00+00:00"
+    assert len(points) == 5
+
+
+def test_rolling_counts_on_empty_index():
+    index = TimeIndex.from_records([], "at")
+    assert index.rolling_counts(timedelta(days=1), timedelta(days=1)) == []
+    assert index.rolling_counts(timedelta(days=1), timedelta(days=1), until="2024-01-02") == [
+        {"end": "2024-01-02T00:00:00+00:00", "count": 0}
+    ]
@@ -0,0 +1,153 @@
+"""Sorted timestamp index for time-windowed queries over record lists.
+
+Records are sorted by timestamp once; afterwards any [since, until) range is two
+binary searches. Numeric columns keep prefix sums and categorical columns keep
+per-category sorted positions, so counts, sums, means and category histograms
+for a range cost O(log n) (O(k log n) for k categories) instead of a rescan.
+"""
+from datetime import datetime, timedelta
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+TimeLike = datetime | pd.Timestamp | str | None
+
+
+def _to_ns(value: TimeLike) -> np.datetime64 | None:
+    """UTC datetime64[ns] for a timestamp; naive values are taken as UTC."""
+    if value is None:
+        return None
+    ts = pd.Timestamp(value)
+    ts = ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+    return np.datetime64(ts.tz_convert(None).to_datetime64(), "ns")
+
+
+def _label(value: Any) -> str:
+    # Integer-valued floats (columns with gaps are upcast) read as "3", not "3.0".
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _iso(value: np.datetime64) -> str:
+    return pd.Timestamp(value, tz="UTC").isoformat()
+
+
+class TimeIndex:
+    def __init__(
+        self,
+        times: pd.Series,
+        values: dict[str, Any] | None = None,
+        categories: dict[str, Any] | None = None,
+    ):
+        """`times` is parsed as UTC; `values` and `categories` are columns aligned
+        with it. Rows whose timestamp cannot be parsed are left out."""
+        parsed = pd.to_datetime(pd.Series(times, dtype=object), utc=True, errors="coerce", format="mixed")
+        ns = parsed.to_numpy(dtype="datetime64[ns]")
+        valid = np.flatnonzero(parsed.notna().to_numpy())
+        order = valid[np.argsort(ns[valid], kind="stable")]
+
+        self._times = ns[order]
+        self._prefix_sums: dict[str, np.ndarray] = {}
+        self._prefix_counts: dict[str, np.ndarray] = {}
+        for key, column in (values or {}).items():
+            column = pd.to_numeric(pd.Series(column), errors="coerce").to_numpy(dtype=float)[order]
+            present = ~np.isnan(column)
+            self._prefix_sums[key] = np.concatenate([[0.0], np.cumsum(np.where(present, column, 0.0))])
+            self._prefix_counts[key] = np.concatenate([[0], np.cumsum(present)])
+
+        # category -> {label: sorted positions (in time order) holding that label}
+        self._positions: dict[str, dict[str, np.ndarray]] = {}
+        for key, column in (categories or {}).items():
+            codes, labels = pd.factorize(pd.Series(column).to_numpy()[order])
+            positions = np.flatnonzero(codes >= 0)
+            positions = positions[np.argsort(codes[positions], kind="stable")]
+            bounds = np.searchsorted(codes[positions], np.arange(len(labels) + 1))
+            self._positions[key] = {
+                _label(label): positions[bounds[i]:bounds[i + 1]]
+                for i, label in enumerate(labels)
+            }
+
+    @classmethod
+    def from_records(
+        cls,
+        records: list[dict[str, Any]],
+        time_key: str,
+        value_keys: tuple[str, ...] = (),
+        category_keys: tuple[str, ...] = (),
+    ) -> "TimeIndex":
+        return cls(
+            [r.get(time_key) for r in records],
+            values={key: [r.get(key) for r in records] for key in value_keys},
+            categories={key: [r.get(key) for r in records] for key in category_keys},
+        )
+
+    def __len__(self) -> int:
+        return len(self._times)
+
+    @property
+    def first(self) -> str | None:
+        return _iso(self._times[0]) if len(self) else None
+
+    @property
+    def last(self) -> str | None:
+        return _iso(self._times[-1]) if len(self) else None
+
+    def _bounds(self, since: TimeLike, until: TimeLike) -> tuple[int, int]:
+        since_ns, until_ns = _to_ns(since), _to_ns(until)
+        lo = int(np.searchsorted(self._times, since_ns, side="left")) if since_ns is not None else 0
+        hi = int(np.searchsorted(self._times, until_ns, side="left")) if until_ns is not None else len(self)
+        return lo, max(lo, hi)
+
+    def count(self, since: TimeLike = None, until: TimeLike = None) -> int:
+        lo, hi = self._bounds(since, until)
+        return hi - lo
+
+    def sum(self, key: str, since: TimeLike = None, until: TimeLike = None) -> float:
+        lo, hi = self._bounds(since, until)
+        return float(self._prefix_sums[key][hi] - self._prefix_sums[key][lo])
+
+    def mean(self, key: str, since: TimeLike = None, until: TimeLike = None) -> float | None:
+        lo, hi = self._bounds(since, until)
+        present = int(self._prefix_counts[key][hi] - self._prefix_counts[key][lo])
+        if present == 0:
+            return None
+        return float(self._prefix_sums[key][hi] - self._prefix_sums[key][lo]) / present
+
+    def counts_by(self, key: str, since: TimeLike = None, until: TimeLike = None) -> dict[str, int]:
+        """Histogram of category `key` over the range (zero counts omitted)."""
+        lo, hi = self._bounds(since, until)
+        counts = {}
+        for label, positions in self._positions[key].items():
+            n = int(np.searchsorted(positions, hi) - np.searchsorted(positions, lo))
+            if n:
+                counts[label] = n
+        return counts
+
+    def rolling_counts(
+        self,
+        window: timedelta,
+        step: timedelta,
+        since: TimeLike = None,
+        until: TimeLike = None,
+        max_points: int = 90,
+    ) -> list[dict[str, Any]]:
+        """Number of records in the trailing `window` at every `step` up to `until`
+        (default: just after the last record); each window is [end - window, end).
+        Points start once a full window fits after `since` (at least one point is
+        returned); only the most recent `max_points` are kept."""
+        if until is None and not len(self):
+            return []
+        step_ns = np.timedelta64(pd.Timedelta(step).value, "ns")
+        window_ns = np.timedelta64(pd.Timedelta(window).value, "ns")
+        end = _to_ns(until) if until is not None else self._times[-1] + np.timedelta64(1, "ns")
+        if since is not None:
+            start = _to_ns(since)
+        else:
+            start = self._times[0] if len(self) else end - window_ns
+        points = max(1, min(max_points, int((end - start - window_ns) // step_ns) + 1))
+
+        ends = end - step_ns * np.arange(points - 1, -1, -1)
+        counts = np.searchsorted(self._times, ends, side="left") - np.searchsorted(self._times, ends - window_ns, side="left")
+        return [{"end": _iso(e), "count": int(c)} for e, c in zip(ends, counts)]
@@ -1,11 +1,19 @@
 from typing import Any
 
 import pandas as pd
-from scipy.stats import chi2_contingency
 
+from .significance import cached, confidence_interval, pairwise_mannwhitney, snapshot_hash
+from .streaming import StreamingAnalytics
 
-def analyze_transactions(data: dict[str, list[dict[str, Any]]]) -> dict:
+
+def analyze_transactions(
+    data: dict[str, list[dict[str, Any]]],
+    approximate: StreamingAnalytics | None = None,
+) -> dict:
     """Analyze transaction patterns: basket size, discounts, cancellations."""
+    if approximate is not None:
+        return approximate.transactions_report()
+
     transactions = data["transactions"]
     orders = data["orders"]
 
@@ -24,6 +32,13 @@ def analyze_transactions(data: dict[str, list[dict[str, Any]]]) -> dict:
     avg_order_value = round(float(trans_df["totalPrice"].mean()), 2)
     median_order_value = round(float(trans_df["totalPrice"].median()), 2)
 
+    order_value_key = "transactions:" + snapshot_hash(trans_df, ["totalPrice", "status"])
+    order_value_significance = cached(order_value_key, lambda: {
+        "mean_ci": confidence_interval(trans_df["totalPrice"], "mean", method="normal"),
+        "median_ci": confidence_interval(trans_df["totalPrice"], "median", method="bootstrap"),
+        "pairwise_by_status": pairwise_mannwhitney(trans_df, "status", "totalPrice"),
+    })
+
     # Status distribution
     status_dist = trans_df["status"].value_counts().to_dict()
 
@@ -34,6 +49,8 @@ def analyze_transactions(data: dict[str, list[dict[str, Any]]]) -> dict:
     chi2_result = None
     contingency = pd.crosstab(trans_df["has_discount"], trans_df["is_completed"])
     if contingency.shape == (2, 2):
+        from scipy.stats import chi2_contingency  # deferred: scipy.stats is slow to import
+
         chi2, p, dof, expected = chi2_contingency(contingency)
         chi2_result = {
             "chi2_statistic": round(float(chi2), 4),
@@ -67,6 +84,7 @@ def analyze_transactions(data: dict[str, list[dict[str, Any]]]) -> dict:
         "median_basket_size": median_basket_size,
         "avg_order_value": avg_order_value,
         "median_order_value": median_order_value,
+        "order_value_significance": order_value_significance,
         "status_distribution": status_dist,
         "chi2_discount_vs_completion": chi2_result,
         "discount_stats": discount_stats,
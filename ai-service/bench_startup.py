@@ -0,0 +1,42 @@
+"""Cold-start benchmark: import time of the app and of each lazily-loaded module.
+
+Each measurement runs in a fresh interpreter so nothing is cached in sys.modules.
+
+    python bench_startup.py [--runs 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+from warmup import HEAVY_MODULES
+
+_SNIPPET = "import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+
+
+def _cold_import_seconds(module: str, runs: int) -> float:
+    env = {"CONVEX_URL": "https://bench.convex.cloud", "OPENAI_API_KEY": "bench", **os.environ}
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _SNIPPET.format(module=module)],
+            capture_output=True, text=True, check=True, env=env,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'module':<28}{'cold import (median, s)':>26}")
+    for module in ("main", *HEAVY_MODULES):
+        print(f"{module:<28}{_cold_import_seconds(module, args.runs):>26.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,10 +5,70 @@ class Settings(BaseSettings):
     convex_url: str
     openai_api_key: str
     cache_ttl_seconds: int = 300
+    # Per-table overrides for cache_ttl_seconds (seconds). Reference tables change
+    # rarely, transactional ones constantly.
+    table_ttl_seconds: dict[str, int] = {
+        "clients": 3600,
+        "products": 3600,
+        "orders": 60,
+        "returns": 300,
+        "transactions": 30,
+    }
+    # After a failed refresh, serve the stale copy this long before retrying Convex.
+    convex_retry_seconds: int = 15
+
+    # OpenAI client resilience (see llm_client.py)
+    openai_timeout_seconds: float = 20.0
+    openai_deadline_seconds: float = 45.0
+    openai_max_retries: int = 2
+    openai_backoff_base_seconds: float = 0.5
+    openai_backoff_cap_seconds: float = 8.0
+    openai_hedge_enabled: bool = False
+    openai_hedge_percentile: float = 0.95
+    openai_max_concurrency: int = 8
+    openai_breaker_failures: int = 5
+    openai_breaker_reset_seconds: float = 30.0
+
+    # Model per LLM task (see llm_router.py)
+    llm_default_model: str = "gpt-4o"
+    llm_models: dict[str, str] = {
+        "insights": "gpt-4o",
+        "dispatch": "gpt-4o",
+        "personnel_summary": "gpt-4o-mini",
+    }
+    prompt_max_list_items: int = 25
+
+    # CPU-bound work offload (see executor.py) and event-loop lag monitoring
+    cpu_executor_kind: str = "thread"  # "thread" or "process"
+    cpu_executor_workers: int = 4
+    loop_lag_interval_seconds: float = 0.5
+    loop_lag_threshold_seconds: float = 0.1  # 0 disables the monitor
+
+    # Pre-import heavy modules and open the Convex HTTP pool before /health/ready passes
+    warmup_on_startup: bool = False
+    # Seconds to reuse the /api/export snapshot across requests. Without webhooks a
+    # reused snapshot misses changes made since it was fetched, so 0 (the default)
+    # fetches it on every request. With AI_WEBHOOK_SECRET set, pushed changes patch
+    # or drop it, and it is reused for at least INSIGHTS_TTL_SECONDS.
+    snapshot_ttl_seconds: int = 0
+
+    # Page size when streaming tables into sketches (convex_client.fetch_sketches)
+    sketch_page_size: int = 5000
+
+    # Convex change webhooks (POST /webhooks/convex-change). The default /insights
+    # result (and the export snapshot beyond SNAPSHOT_TTL_SECONDS) is only cached
+    # while this is set, since pushed changes are what invalidate it.
+    ai_webhook_secret: str = ""  # HMAC-SHA256 key shared with Convex; empty disables the endpoint
+    # Deliveries carry a signed sent_at; older (or replayed) ones are rejected.
+    webhook_max_age_seconds: int = 300
+    # Changes to fields the default insights read recompute them in the background
+    # once no further change has arrived for this long.
+    webhook_debounce_seconds: float = 2.0
+    webhook_recompute_insights: bool = True
+    insights_ttl_seconds: int = 300
 
     model_config = {"env_file": ".env.local", "extra": "ignore"}
 
 
 
 settings = Settings()
-
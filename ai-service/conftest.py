@@ -0,0 +1,5 @@
+import os
+
+# Settings() requires these at import time; tests never reach the real services.
+os.environ.setdefault("CONVEX_URL", "https://test.convex.cloud")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
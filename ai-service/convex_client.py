@@ -1,19 +1,50 @@
 import asyncio
+import logging
 import time
-from typing import Any
+from typing import Any, AsyncIterator, Iterable
 
 import httpx
 
 from config import settings
+from executor import run_cpu
 
+logger = logging.getLogger(__name__)
+
+# table name -> (fetched_at, rows). Expired entries are kept so a failed refresh
+# can fall back to the last good copy.
 _cache: dict[str, tuple[float, list[dict]]] = {}
+# table name -> time of the last failed refresh; the stale copy is served without
+# retrying until settings.convex_retry_seconds have passed.
+_failed_at: dict[str, float] = {}
+
+_http_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared, connection-pooled client for all Convex requests."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(timeout=30.0)
+    return _http_client
+
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
 
 
-async def _fetch_table(client: httpx.AsyncClient, function_path: str) -> list[dict]:
-    """Fetch a single table via the Convex HTTP query API."""
+async def _fetch_table(
+    client: httpx.AsyncClient,
+    function_path: str,
+    limit: int = 100000,
+    offset: int = 0,
+) -> list[dict]:
+    """Fetch a single table (or one page of it) via the Convex HTTP query API."""
     resp = await client.post(
         f"{settings.convex_url}/api/query",
-        json={"path": function_path, "args": {"limit": 100000, "offset": 0}},
+        json={"path": function_path, "args": {"limit": limit, "offset": offset}},
     )
     resp.raise_for_status()
     data = resp.json()
@@ -39,24 +70,95 @@ TABLES = {
 }
 
 
-async def fetch_all() -> dict[str, list[dict[str, Any]]]:
-    """Fetch all tables in parallel. Results are cached for CACHE_TTL_SECONDS."""
-    now = time.time()
-    cache_key = "all_tables"
+def _ttl_for(table: str) -> int:
+    return settings.table_ttl_seconds.get(table, settings.cache_ttl_seconds)
 
-    if cache_key in _cache:
-        cached_at, cached_data = _cache[cache_key]
-        if now - cached_at < settings.cache_ttl_seconds:
-            return cached_data
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        tasks = {name: _fetch_table(client, path) for name, path in TABLES.items()}
-        results = await asyncio.gather(*tasks.values())
+async def fetch(tables: Iterable[str] | None = None) -> dict[str, list[dict[str, Any]]]:
+    """Fetch the requested tables (all of TABLES by default).
 
-    data = dict(zip(tasks.keys(), results))
-    _cache[cache_key] = (now, data)
-    return data
+    Each table is cached separately with its own TTL, so only expired tables are
+    refetched. If a refresh fails and an older copy of that table is cached, the
+    stale copy is served instead of failing the whole call, and the table is not
+    retried for CONVEX_RETRY_SECONDS so an outage doesn't stall every request.
+    """
+    names = list(TABLES) if tables is None else list(dict.fromkeys(tables))
+    unknown = [name for name in names if name not in TABLES]
+    if unknown:
+        raise KeyError(f"Unknown Convex tables: {unknown}")
 
+    now = time.time()
+    stale = [
+        name for name in names
+        if name not in _cache or (
+            now - _cache[name][0] >= _ttl_for(name)
+            and now - _failed_at.get(name, -float("inf")) >= settings.convex_retry_seconds
+        )
+    ]
+
+    if stale:
+        client = get_http_client()
+        results = await asyncio.gather(
+            *(_fetch_table(client, TABLES[name]) for name in stale),
+            return_exceptions=True,
+        )
+
+        for name, result in zip(stale, results):
+            if not isinstance(result, BaseException):
+                _cache[name] = (now, result)
+                _failed_at.pop(name, None)
+            elif isinstance(result, Exception) and name in _cache:
+                _failed_at[name] = now
+                logger.warning(
+                    f"Refreshing '{name}' failed ({type(result).__name__}: {result}); "
+                    f"serving copy from {now - _cache[name][0]:.0f}s ago"
+                )
+            else:
+                raise result
+
+    return {name: _cache[name][1] for name in names}
 
-def invalidate_cache() -> None:
-    _cache.clear()
+
+async def fetch_all() -> dict[str, list[dict[str, Any]]]:
+    """Fetch all tables in parallel. Each table is cached for its own TTL."""
+    return await fetch()
+
+
+async def iter_pages(table: str, page_size: int | None = None) -> AsyncIterator[list[dict[str, Any]]]:
+    """Yield a table page by page (uncached), so callers never hold all rows at once."""
+    page_size = page_size or settings.sketch_page_size
+    offset = 0
+    while True:
+        page = await _fetch_table(get_http_client(), TABLES[table], limit=page_size, offset=offset)
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        offset += page_size
+
+
+async def fetch_sketches(
+    tables: Iterable[str] = ("transactions", "orders", "returns"),
+    page_size: int | None = None,
+):
+    """Stream `tables` into a StreamingAnalytics instance for the approximate
+    analyzer mode. Memory stays bounded by one page plus the sketches."""
+    from analyzers.streaming import StreamingAnalytics
+
+    clients = (await fetch(["clients"]))["clients"]
+    sketches = await run_cpu(StreamingAnalytics, clients)
+    for table in tables:
+        async for page in iter_pages(table, page_size):
+            sketches = await run_cpu(sketches.update, table, page)
+    return sketches
+
+
+def invalidate_cache(tables: Iterable[str] | None = None) -> None:
+    """Drop cached tables (all of them when `tables` is None)."""
+    if tables is None:
+        _cache.clear()
+        _failed_at.clear()
+        return
+    for name in tables:
+        _cache.pop(name, None)
+        _failed_at.pop(name, None)
@@ -0,0 +1,47 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_executor: Executor | None = None
+
+
+def get_executor() -> Executor:
+    """Shared pool for CPU-bound work (PDF rendering, sketch updates).
+
+    settings.cpu_executor_kind picks "thread" or "process". Threads only help
+    code that releases the GIL (numpy, pandas); a process pool avoids the GIL
+    but pickles arguments and results, so only offload calls whose inputs and
+    outputs are small relative to the work.
+    """
+    global _executor
+    if _executor is None:
+        workers = settings.cpu_executor_workers
+        if settings.cpu_executor_kind == "process":
+            _executor = ProcessPoolExecutor(max_workers=workers)
+        elif settings.cpu_executor_kind == "thread":
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cpu")
+        else:
+            raise ValueError(f"Unknown cpu_executor_kind: {settings.cpu_executor_kind!r}")
+        logger.info(f"Started {settings.cpu_executor_kind} executor with {workers} workers")
+    return _executor
+
+
+async def run_cpu(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run `func(*args, **kwargs)` on the shared executor without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,92 @@
+import asyncio
+import hashlib
+import hmac
+import logging
+import time
+
+from config import settings
+from pipeline import affects_insights, patch_snapshot, run_pipeline
+
+logger = logging.getLogger(__name__)
+
+_timer: asyncio.TimerHandle | None = None
+_task: asyncio.Task | None = None
+# signature -> sent_at of accepted deliveries, for replay detection
+_seen: dict[str, float] = {}
+
+
+def verify_signature(body: bytes, signature: str | None) -> bool:
+    """Check an `X-Webhook-Signature: sha256=<hex>` header against the raw body."""
+    if not signature or not settings.ai_webhook_secret:
+        return False
+    expected = hmac.new(settings.ai_webhook_secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(signature, f"sha256={expected}")
+
+
+def check_delivery(signature: str, sent_at_ms: int) -> str | None:
+    """Reject verified bodies that are stale or were already accepted. Returns the
+    reason for rejecting, or None after recording the delivery."""
+    now = time.time()
+    max_age = settings.webhook_max_age_seconds
+    sent_at = sent_at_ms / 1000
+    if abs(now - sent_at) > max_age:
+        return "stale"
+    # Anything older than max_age is rejected as stale, so that is all we need to remember.
+    for seen, seen_at in list(_seen.items()):
+        if now - seen_at > max_age:
+            del _seen[seen]
+    if signature in _seen:
+        return "replayed"
+    _seen[signature] = sent_at
+    return None
+
+
+def apply_changes(changes: list[dict]) -> dict:
+    """Patch or drop the cached snapshot for the changed rows and, if any change
+    affects the default insights, schedule a debounced recomputation. Changes the
+    insights do not read (e.g. a saved aiProfileSummary) cost no OpenAI call."""
+    snapshot = patch_snapshot(changes)
+    recompute = settings.webhook_recompute_insights and any(affects_insights(c) for c in changes)
+    if recompute:
+        schedule_recompute()
+    return {
+        "tables": sorted({change["table"] for change in changes}),
+        "snapshot": snapshot,
+        "recompute_scheduled": recompute,
+    }
+
+
+def schedule_recompute() -> None:
+    """(Re)start the debounce timer; bursts of changes trigger one recomputation."""
+    global _timer
+    if _timer is not None:
+        _timer.cancel()
+    _timer = asyncio.get_running_loop().call_later(settings.webhook_debounce_seconds, _start_recompute)
+
+
+def _start_recompute() -> None:
+    global _timer, _task
+    _timer = None
+    if _task is not None and not _task.done():
+        _task.cancel()  # it was working from data that has changed since
+    _task = asyncio.create_task(_recompute())
+
+
+async def _recompute() -> None:
+    try:
+        await run_pipeline()
+        logger.info("Recomputed insights after Convex changes")
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.warning(f"Background insights recomputation failed: {type(e).__name__}: {e}")
+
+
+def cancel_recompute() -> None:
+    global _timer, _task
+    if _timer is not None:
+        _timer.cancel()
+        _timer = None
+    if _task is not None:
+        _task.cancel()
+        _task = None
@@ -0,0 +1,234 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, Callable
+
+import openai
+from openai import AsyncOpenAI
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_client: AsyncOpenAI | None = None
+
+_semaphore = asyncio.Semaphore(settings.openai_max_concurrency)
+_latencies: deque[float] = deque(maxlen=200)
+
+# Called once per HTTP attempt (retries and hedges included) with
+# (latency_seconds, usage or None, exception or None).
+AttemptHook = Callable[[float, Any, BaseException | None], None]
+
+
+def get_client() -> AsyncOpenAI:
+    """Shared OpenAI client, built on first use rather than at import time."""
+    global _client
+    if _client is None:
+        # Retries are handled below (with jitter and a shared deadline), so the
+        # SDK's own retry loop is disabled.
+        _client = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            timeout=settings.openai_timeout_seconds,
+            max_retries=0,
+        )
+    return _client
+
+
+class LLMUnavailableError(Exception):
+    """The completion could not be obtained: circuit open, retries exhausted or deadline hit."""
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures and rejects calls for
+    `reset_seconds`. After that a single probe call is let through (half-open);
+    its outcome closes or re-opens the circuit."""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def release_probe(self) -> None:
+        """Forget an abandoned (cancelled) half-open probe so another can run."""
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._probing = False
+        if self._failures >= self.failure_threshold:
+            if self._opened_at is None:
+                logger.warning(f"[llm] Circuit opened after {self._failures} consecutive failures")
+            self._opened_at = time.monotonic()
+
+
+breaker = CircuitBreaker(settings.openai_breaker_failures, settings.openai_breaker_reset_seconds)
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, (openai.APITimeoutError, openai.APIConnectionError, openai.RateLimitError)):
+        return True
+    return isinstance(exc, openai.APIStatusError) and exc.status_code >= 500
+
+
+def _backoff(attempt: int, exc: BaseException) -> float:
+    """Full-jitter exponential backoff, honouring Retry-After on 429s."""
+    if isinstance(exc, openai.RateLimitError):
+        retry_after = exc.response.headers.get("retry-after")
+        try:
+            return min(float(retry_after), settings.openai_backoff_cap_seconds)
+        except (TypeError, ValueError):
+            pass
+    cap = min(settings.openai_backoff_cap_seconds, settings.openai_backoff_base_seconds * 2 ** attempt)
+    return random.uniform(0, cap)
+
+
+def _hedge_delay() -> float | None:
+    """Latency percentile after which a second, hedged request is sent."""
+    if not settings.openai_hedge_enabled or len(_latencies) < 20:
+        return None
+    ordered = sorted(_latencies)
+    index = min(int(len(ordered) * settings.openai_hedge_percentile), len(ordered) - 1)
+    return ordered[index]
+
+
+async def _timed_create(kwargs: dict[str, Any], on_attempt: AttemptHook | None) -> Any:
+    started = time.monotonic()
+    try:
+        response = await get_client().chat.completions.create(**kwargs)
+    except BaseException as e:
+        # Includes CancelledError for losing hedges and deadline cut-offs.
+        if on_attempt is not None:
+            on_attempt(time.monotonic() - started, None, e)
+        raise
+    latency = time.monotonic() - started
+    _latencies.append(latency)
+    if on_attempt is not None:
+        on_attempt(latency, getattr(response, "usage", None), None)
+    return response
+
+
+async def _hedged_create(kwargs: dict[str, Any], on_attempt: AttemptHook | None) -> Any:
+    tasks = [asyncio.create_task(_timed_create(kwargs, on_attempt))]
+    try:
+        delay = _hedge_delay()
+        if delay is not None:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            # The hedge needs its own concurrency slot; don't jump the queue for one.
+            if not done and not _semaphore.locked():
+                await _semaphore.acquire()
+                logger.info(f"[llm] No response after {delay:.2f}s, sending hedged request")
+                hedge = asyncio.create_task(_timed_create(kwargs, on_attempt))
+                hedge.add_done_callback(lambda _: _semaphore.release())
+                tasks.append(hedge)
+
+        pending = set(tasks)
+        error: BaseException | None = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        # Also runs when the deadline cancels us: no request may outlive the call
+        # (or the concurrency slot it was counted against).
+        unfinished = [task for task in tasks if not task.done()]
+        for task in unfinished:
+            task.cancel()
+        if unfinished:
+            await asyncio.wait(unfinished)
+
+
+async def _create_with_retries(kwargs: dict[str, Any], on_attempt: AttemptHook | None) -> Any:
+    attempts = settings.openai_max_retries + 1
+    for attempt in range(attempts):
+        try:
+            return await _hedged_create(kwargs, on_attempt)
+        except Exception as e:
+            if not _is_retryable(e) or attempt == attempts - 1:
+                raise
+            delay = _backoff(attempt, e)
+            logger.warning(
+                f"[llm] Attempt {attempt + 1}/{attempts} failed ({type(e).__name__}), retrying in {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
+
+
+async def chat_completion(
+    *,
+    deadline: float | None = None,
+    on_attempt: AttemptHook | None = None,
+    **kwargs: Any,
+) -> Any:
+    """Resilient drop-in for `client.chat.completions.create(**kwargs)`.
+
+    Waiting for a concurrency slot and the call itself (retries, hedged requests)
+    are each bounded by `deadline` seconds, defaulting to
+    `settings.openai_deadline_seconds`; only the call counts towards the circuit
+    breaker, since a full queue says nothing about OpenAI's health.
+    Raises LLMUnavailableError when the circuit is open, no slot frees up in time
+    or the call fails with a transient error, so callers can answer with a
+    deterministic fallback. `on_attempt`, if given, is told about every
+    individual request, including failed, timed-out and losing hedged ones.
+    """
+    if not breaker.allow():
+        raise LLMUnavailableError("OpenAI circuit breaker is open")
+
+    timeout = deadline if deadline is not None else settings.openai_deadline_seconds
+    try:
+        async with asyncio.timeout(timeout):
+            await _semaphore.acquire()
+    except asyncio.CancelledError:
+        breaker.release_probe()
+        raise
+    except TimeoutError as e:
+        breaker.release_probe()
+        raise LLMUnavailableError(f"No OpenAI concurrency slot free within {timeout}s") from e
+
+    try:
+        response = await asyncio.wait_for(_create_with_retries(kwargs, on_attempt), timeout)
+    except asyncio.CancelledError:
+        breaker.release_probe()
+        raise
+    except asyncio.TimeoutError as e:
+        breaker.record_failure()
+        raise LLMUnavailableError(f"OpenAI call exceeded {timeout}s deadline") from e
+    except Exception as e:
+        if not _is_retryable(e):
+            # The API answered (e.g. 400), so the service itself is healthy.
+            breaker.record_success()
+            raise
+        breaker.record_failure()
+        raise LLMUnavailableError(f"OpenAI call failed: {type(e).__name__}: {e}") from e
+    finally:
+        _semaphore.release()
+
+    breaker.record_success()
+    return response
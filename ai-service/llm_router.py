@@ -0,0 +1,123 @@
+import asyncio
+import functools
+import re
+import time
+from collections import Counter
+from typing import Any
+
+from config import settings
+from llm_client import LLMUnavailableError, chat_completion
+
+# route -> cumulative usage, so model/prompt changes can be measured per task.
+_route_stats: dict[str, dict[str, float]] = {}
+
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+def model_for(route: str) -> str:
+    """Model configured for a route in settings.llm_models, else the default model."""
+    return settings.llm_models.get(route, settings.llm_default_model)
+
+
+def compact_prompt(prompt: str) -> str:
+    """Strip per-line indentation and trailing spaces and collapse runs of blank lines."""
+    lines = [line.strip() for line in prompt.strip().splitlines()]
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines))
+
+
+def cap_list(lines: list[str], limit: int | None = None) -> list[str]:
+    """Keep the first `limit` entries, noting how many were dropped."""
+    limit = settings.prompt_max_list_items if limit is None else limit
+    if len(lines) <= limit:
+        return lines
+    return lines[:limit] + [f"... and {len(lines) - limit} more"]
+
+
+def summarize_incidents(incidents: list[dict[str, Any]]) -> str:
+    """One-line summary of an incident list: counts by type and severity range."""
+    if not incidents:
+        return "none"
+    by_type = Counter(i.get("type") or i.get("incident_type") or "Unknown" for i in incidents)
+    severities = [
+        i.get("severityLevel", i.get("severity_level"))
+        for i in incidents
+    ]
+    severities = [s for s in severities if isinstance(s, (int, float))]
+
+    summary = f"{len(incidents)} total (" + ", ".join(f"{t}: {n}" for t, n in by_type.most_common()) + ")"
+    if severities:
+        summary += f"; severity avg {sum(severities) / len(severities):.1f}, max {max(severities)}"
+    return summary
+
+
+def _stats_for(route: str, model: str) -> dict[str, float]:
+    stats = _route_stats.setdefault(route, {
+        "model": model,
+        "calls": 0,
+        "errors": 0,
+        "fallbacks": 0,
+        "attempts": 0,
+        "failed_attempts": 0,
+        "cancelled_attempts": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "total_latency_seconds": 0.0,
+        "attempt_latency_seconds": 0.0,
+    })
+    stats["model"] = model
+    return stats
+
+
+def _record_attempt(route: str, model: str, latency: float, usage: Any, error: BaseException | None) -> None:
+    stats = _stats_for(route, model)
+    stats["attempts"] += 1
+    stats["attempt_latency_seconds"] += latency
+    if isinstance(error, asyncio.CancelledError):
+        stats["cancelled_attempts"] += 1
+    elif error is not None:
+        stats["failed_attempts"] += 1
+    if usage is not None:
+        stats["prompt_tokens"] += usage.prompt_tokens or 0
+        stats["completion_tokens"] += usage.completion_tokens or 0
+
+
+async def complete(route: str, prompt: str, role: str = "system", **kwargs: Any) -> Any:
+    """Compact `prompt`, send it to the route's model and record tokens/latency,
+    per call and per attempt, including calls that fail or fall back."""
+    model = model_for(route)
+    stats = _stats_for(route, model)
+    started = time.monotonic()
+    try:
+        return await chat_completion(
+            model=model,
+            messages=[{"role": role, "content": compact_prompt(prompt)}],
+            on_attempt=functools.partial(_record_attempt, route, model),
+            **kwargs,
+        )
+    except LLMUnavailableError:
+        stats["errors"] += 1
+        stats["fallbacks"] += 1
+        raise
+    except Exception:
+        stats["errors"] += 1
+        raise
+    finally:
+        stats["calls"] += 1
+        stats["total_latency_seconds"] += time.monotonic() - started
+
+
+def route_stats() -> dict[str, dict[str, float]]:
+    """Per-route totals plus average latency and tokens per call and attempt."""
+    report = {}
+    for route, stats in _route_stats.items():
+        calls = max(stats["calls"], 1)
+        report[route] = {
+            **stats,
+            "avg_latency_seconds": round(stats["total_latency_seconds"] / calls, 3),
+            "avg_attempt_latency_seconds": round(
+                stats["attempt_latency_seconds"] / max(stats["attempts"], 1), 3
+            ),
+            "avg_prompt_tokens": round(stats["prompt_tokens"] / calls, 1),
+            "avg_completion_tokens": round(stats["completion_tokens"] / calls, 1),
+        }
+    return report
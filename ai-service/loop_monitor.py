@@ -0,0 +1,50 @@
+import asyncio
+import logging
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_stats: dict[str, float] = {
+    "samples": 0,
+    "blocked_events": 0,
+    "last_lag_seconds": 0.0,
+    "max_lag_seconds": 0.0,
+    "total_blocked_seconds": 0.0,
+}
+_task: asyncio.Task | None = None
+
+
+async def _monitor(interval: float, threshold: float) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        # Anything beyond the requested sleep is time the loop was busy elsewhere.
+        lag = max(loop.time() - started - interval, 0.0)
+        _stats["samples"] += 1
+        _stats["last_lag_seconds"] = lag
+        _stats["max_lag_seconds"] = max(_stats["max_lag_seconds"], lag)
+        if lag >= threshold:
+            _stats["blocked_events"] += 1
+            _stats["total_blocked_seconds"] += lag
+            logger.warning(f"Event loop blocked for {lag * 1000:.0f}ms")
+
+
+def start_loop_monitor() -> None:
+    global _task
+    if _task is None and settings.loop_lag_threshold_seconds > 0:
+        _task = asyncio.create_task(
+            _monitor(settings.loop_lag_interval_seconds, settings.loop_lag_threshold_seconds)
+        )
+
+
+def stop_loop_monitor() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        _task = None
+
+
+def loop_lag_stats() -> dict[str, float]:
+    return {**_stats, "threshold_seconds": settings.loop_lag_threshold_seconds}
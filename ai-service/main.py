@@ -1,14 +1,35 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import Response
+import time
+
+_import_started = time.perf_counter()
+
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Dict, Any
+from pydantic import BaseModel, ValidationError
+from typing import List, Dict, Any, Optional
 
 # Assuming you've updated models.py, pipeline.py, and report_generator.py
 # based on the previous Mountain Rescue steps.
-from models import AnalysisResult, DispatchRecommendationRequest, DispatchRecommendationResponse
+from models import (
+    AnalysisResult,
+    ConvexChangeEvent,
+    ConvexChangeResponse,
+    DispatchRecommendationRequest,
+    DispatchRecommendationResponse,
+)
 from pipeline import run_pipeline, generate_personnel_summary, generate_dispatch_recommendation
-from report_generator import generate_pdf
+from llm_client import breaker
+from llm_router import route_stats
+from executor import run_cpu, shutdown_executor
+from loop_monitor import loop_lag_stats, start_loop_monitor, stop_loop_monitor
+from config import settings
+from convex_client import close_http_client
+from invalidation import apply_changes, cancel_recompute, check_delivery, verify_signature
+import warmup
 
 import logging
 import traceback
@@ -16,7 +37,28 @@ import traceback
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Command Center AI Service", version="1.0.0")
+IMPORT_SECONDS = round(time.perf_counter() - _import_started, 3)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_loop_monitor()
+    warmup_task = None
+    if settings.warmup_on_startup:
+        # Runs in the background so liveness answers while readiness is pending.
+        warmup_task = asyncio.create_task(warmup.warm_up())
+    else:
+        warmup.state["ready"] = True
+    yield
+    if warmup_task is not None:
+        warmup_task.cancel()
+    cancel_recompute()
+    stop_loop_monitor()
+    shutdown_executor()
+    await close_http_client()
+
+
+app = FastAPI(title="Command Center AI Service", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -29,6 +71,12 @@ app.add_middleware(
 class HealthResponse(BaseModel):
     status: str = "ok"
 
+class ReadinessResponse(BaseModel):
+    ready: bool
+    import_seconds: float
+    warmup_seconds: float | None = None
+    warmup_errors: List[str] = []
+
 class PersonnelSummaryRequest(BaseModel):
     name: str
     role: str
@@ -44,13 +92,57 @@ async def health():
     return HealthResponse()
 
 
+@app.get("/health/ready", response_model=ReadinessResponse)
+async def readiness():
+    """Readiness probe: 503 until the optional startup warm-up has finished."""
+    body = ReadinessResponse(
+        ready=warmup.state["ready"],
+        import_seconds=IMPORT_SECONDS,
+        warmup_seconds=warmup.state["warmup_seconds"],
+        warmup_errors=warmup.state["errors"],
+    )
+    return JSONResponse(body.model_dump(), status_code=200 if body.ready else 503)
+
+
+@app.get("/metrics/llm")
+async def llm_metrics():
+    """Per-route model, token, latency and error totals for the OpenAI calls and their attempts."""
+    return {"circuit_state": breaker.state, "routes": route_stats()}
+
+
+@app.get("/metrics/event-loop")
+async def event_loop_metrics():
+    """Event-loop lag samples; blocked_events counts stalls above the threshold."""
+    return loop_lag_stats()
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Naive query timestamps are taken as UTC, as the time indexes do."""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
 @app.get("/insights", response_model=AnalysisResult)
-async def insights():
-    """Fetches operational data from Convex and generates tactical AI insights."""
+async def insights(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    window: Optional[timedelta] = None,
+):
+    """Fetches operational data from Convex and generates tactical AI insights.
+
+    `since`/`until` (ISO 8601) restrict incident and dispatch metrics to that
+    range. `window` (ISO 8601 duration or seconds, e.g. PT24H, P7D) adds a
+    rolling dispatch load; without `since` it selects the trailing window.
+    """
+    if window is not None and window <= timedelta(0):
+        raise HTTPException(status_code=422, detail="window must be positive")
+    # With a window an open `until` means now (see pipeline._window_metrics).
+    end = until or (datetime.now(timezone.utc) if window is not None else None)
+    if since is not None and end is not None and _as_utc(since) >= _as_utc(end):
+        raise HTTPException(status_code=422, detail="since must be before until")
     try:
         # run_pipeline() should now fetch incidents, equipment, personnel, etc., 
         # and pass them to generate_insights()
-        result = await run_pipeline()
+        result = await run_pipeline(since=since, until=until, window=window)
         return result
     except Exception as e:
         traceback.print_exc()
@@ -60,9 +152,11 @@ async def insights():
 @app.post("/insights/report")
 async def generate_report(data: AnalysisResult):
     """Generate a Tactical PDF report from the provided insights data."""
+    from report_generator import generate_pdf  # reportlab is only needed here
+
     try:
         # Pass the validated Pydantic model dump to the PDF generator
-        pdf_bytes = generate_pdf(data.model_dump())
+        pdf_bytes = await run_cpu(generate_pdf, data.model_dump())
         
         return Response(
             content=pdf_bytes,
@@ -97,4 +191,32 @@ async def personnel_summary(data: PersonnelSummaryRequest):
         return PersonnelSummaryResponse(summary=summary)
     except Exception as e:
         traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/webhooks/convex-change", response_model=ConvexChangeResponse)
+async def convex_change(request: Request, x_webhook_signature: Optional[str] = Header(None)):
+    """Push invalidation from Convex mutations (see convex/webhooks.ts).
+
+    The body is signed with HMAC-SHA256 using AI_WEBHOOK_SECRET and carries a
+    sent_at timestamp; stale or replayed deliveries are rejected. Only the changed
+    rows are patched into (or invalidate) the cached snapshot, and insights are
+    recomputed in the background after a short debounce when a change affects them.
+    """
+    if not settings.ai_webhook_secret:
+        raise HTTPException(status_code=503, detail="Webhook secret not configured")
+    body = await request.body()
+    if not verify_signature(body, x_webhook_signature):
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+
+    try:
+        event = ConvexChangeEvent.model_validate_json(body)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors())
+    rejected = check_delivery(x_webhook_signature, event.sent_at)
+    if rejected == "stale":
+        raise HTTPException(status_code=401, detail="Webhook timestamp outside the allowed window")
+    if rejected == "replayed":
+        raise HTTPException(status_code=409, detail="Webhook already processed")
+    logger.info(f"[/webhooks/convex-change] {len(event.changes)} change(s): {sorted({c.table for c in event.changes})}")
+    return ConvexChangeResponse(**apply_changes([c.model_dump() for c in event.changes]))
@@ -1,11 +1,12 @@
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Literal, Optional
 
 class MetricData(BaseModel):
     incidents: Dict[str, Any]
     personnel: Dict[str, Any]
     equipment: Dict[str, Any]
     maintenance: Dict[str, Any]
+    window: Optional[Dict[str, Any]] = None  # set when insights are restricted to a time range
 
 class AnalysisResult(BaseModel):
     executive_summary: str
@@ -27,4 +28,23 @@ class DispatchRecommendationRequest(BaseModel):
 class DispatchRecommendationResponse(BaseModel):
     recommended_personnel: List[str]
     recommended_equipment: List[str]
-    rationale: str
\ No newline at end of file
+    rationale: str
+
+
+class ConvexChange(BaseModel):
+    table: str
+    operation: Literal["insert", "update", "delete"]
+    id: str
+    document: Optional[Dict[str, Any]] = None  # inserted row; None on update/delete
+    fields: Optional[List[str]] = None  # fields an update wrote; None if unknown
+
+
+class ConvexChangeEvent(BaseModel):
+    sent_at: int  # Unix time in milliseconds; covered by the signature
+    changes: List[ConvexChange]
+
+
+class ConvexChangeResponse(BaseModel):
+    tables: List[str]
+    snapshot: str  # "unaffected", "not_cached", "patched" or "invalidated"
+    recompute_scheduled: bool
@@ -1,37 +1,238 @@
+import hashlib
 import json
 import logging
-import httpx
-from openai import AsyncOpenAI
+import time
+from datetime import datetime, timedelta, timezone
 from config import settings
+from convex_client import get_http_client
+from llm_client import LLMUnavailableError
+from llm_router import cap_list, complete, model_for, summarize_incidents
 from models import AnalysisResult, MetricData
 
 logger = logging.getLogger(__name__)
 
-# FIXED: Must be exactly lowercase as defined in config.py
-client = AsyncOpenAI(api_key=settings.openai_api_key)
 
+# Tables of the /api/export snapshot, which Convex change webhooks can patch.
+SNAPSHOT_TABLES = ("incidents", "personnel", "equipment", "maintenance_logs", "dispatches")
+# Fields the default (unwindowed) insights read, per table. Inserts and deletes in
+# these tables always change the counts; updates only matter if they touch one.
+INSIGHT_FIELDS = {
+    "incidents": {"status", "severityLevel", "type"},
+    "personnel": {"isAvailable"},
+    "equipment": {"status"},
+    "maintenance_logs": {"issueType"},
+}
 
-# ADDED: This function was missing! It fetches the data from Convex and passes it to the AI.
-async def run_pipeline() -> dict:
-    logger.info("Fetching operational data from Convex...")
-    
+# (fetched_at, export payload) of the last /api/export snapshot
+_snapshot: tuple[float, dict] | None = None
+# (computed_at, insights) for the default (unwindowed) /insights request
+_insights: tuple[float, dict] | None = None
+# Bumped on every pushed change, so results computed from older data are not cached.
+_generation = 0
+# (digest of the export body, decoded export). An unchanged body yields the same
+# dict, so caches keyed on the snapshot's identity (time indexes) survive refetches.
+_last_export: tuple[bytes, dict] | None = None
+# (table, id) -> time a delete was received, so a late insert webhook cannot
+# resurrect the row. Convex never reuses ids; kept for WEBHOOK_MAX_AGE_SECONDS.
+_tombstones: dict[tuple[str, str], float] = {}
+
+
+def _snapshot_ttl() -> int:
+    # Pushed changes patch or drop the snapshot, so with webhooks configured it is
+    # kept as long as the insights built from it; the TTL only bounds missed pushes.
+    if settings.ai_webhook_secret:
+        return max(settings.snapshot_ttl_seconds, settings.insights_ttl_seconds)
+    return settings.snapshot_ttl_seconds
+
+
+async def fetch_snapshot() -> dict:
+    """Fetch the Convex operational export, reused for SNAPSHOT_TTL_SECONDS, or
+    INSIGHTS_TTL_SECONDS while change webhooks keep it current."""
+    global _snapshot, _last_export
+    now = time.time()
+    ttl = _snapshot_ttl()
+    if _snapshot is not None and now - _snapshot[0] < ttl:
+        return _snapshot[1]
+
+    generation = _generation
     # Convex HTTP routes use .site instead of .cloud
     http_url = settings.convex_url.replace(".cloud", ".site")
-    
-    async with httpx.AsyncClient() as http_client:
-        response = await http_client.get(f"{http_url}/http/api/export")
-        response.raise_for_status()
-        data = response.json()
-        
-    insights = await generate_insights(data)
+
+    response = await get_http_client().get(f"{http_url}/http/api/export")
+    response.raise_for_status()
+
+    body = response.content
+    digest = hashlib.blake2b(body, digest_size=16).digest()
+    if _last_export is not None and _last_export[0] == digest:
+        data = _last_export[1]
+    else:
+        data = json.loads(body)
+        _last_export = (digest, data)
+    if ttl > 0 and generation == _generation:
+        _snapshot = (now, data)
+    return data
+
+
+def invalidate_snapshot() -> None:
+    global _snapshot, _insights, _generation
+    _snapshot = None
+    _insights = None
+    _generation += 1
+
+
+def affects_insights(change: dict) -> bool:
+    """Whether a change ({table, operation, fields}) can alter the default insights.
+    Updates without a field list are assumed to."""
+    read = INSIGHT_FIELDS.get(change["table"])
+    if read is None:
+        return False
+    fields = change.get("fields")
+    return change["operation"] != "update" or fields is None or not read.isdisjoint(fields)
+
+
+def patch_snapshot(changes: list[dict]) -> str:
+    """Apply row-level changes ({table, operation, id, document}) to the cached
+    snapshot and drop the cached insights if a change affects them (see
+    affects_insights). Returns what happened to the snapshot:
+    "unaffected" (no snapshot table changed), "not_cached", "patched", or
+    "invalidated" when a change cannot be applied safely.
+
+    Webhooks can arrive out of order, so only changes that commute are patched:
+    inserts add a row unless it is already present (the snapshot copy is at least
+    as new) or was deleted, and deletes remove the row and leave a tombstone.
+    Updates invalidate the snapshot, as an older update could overwrite a newer one.
+    """
+    global _snapshot, _insights, _generation
+    changes = [c for c in changes if c["table"] in SNAPSHOT_TABLES]
+    if not changes:
+        return "unaffected"
+    if any(affects_insights(c) for c in changes):
+        _insights = None
+    _generation += 1
+
+    now = time.time()
+    for change in changes:
+        if change["operation"] == "delete":
+            _tombstones[(change["table"], change["id"])] = now
+    for key, deleted_at in list(_tombstones.items()):
+        if now - deleted_at > settings.webhook_max_age_seconds:
+            del _tombstones[key]
+
+    if _snapshot is None:
+        return "not_cached"
+    if any(c["operation"] == "update" or (c["operation"] == "insert" and c.get("document") is None) for c in changes):
+        _snapshot = None
+        return "invalidated"
+
+    fetched_at, data = _snapshot
+    # A new dict (not an in-place edit), so per-snapshot time indexes get rebuilt.
+    patched = dict(data)
+    for change in changes:
+        rows = patched.get(change["table"], [])
+        if change["operation"] == "delete":
+            patched[change["table"]] = [row for row in rows if row.get("_id") != change["id"]]
+        elif (change["table"], change["id"]) not in _tombstones and not any(
+            row.get("_id") == change["id"] for row in rows
+        ):
+            patched[change["table"]] = [*rows, change["document"]]
+    _snapshot = (fetched_at, patched)
+    return "patched"
+
+
+# (snapshot the indexes were built from, {"incidents": TimeIndex, "dispatches": TimeIndex})
+_time_indexes: tuple[dict, dict] | None = None
+
+
+def _build_time_indexes(data: dict) -> dict:
+    from analyzers.time_index import TimeIndex  # numpy/pandas, only needed for windowed queries
+
+    return {
+        "incidents": TimeIndex.from_records(
+            data.get("incidents", []),
+            "reportedDate",
+            value_keys=("severityLevel",),
+            category_keys=("severityLevel", "type", "status"),
+        ),
+        "dispatches": TimeIndex.from_records(data.get("dispatches", []), "dispatchTime"),
+    }
+
+
+def get_time_indexes(data: dict) -> dict:
+    """Sorted timestamp indexes for `data`, rebuilt only when the snapshot changes
+    (fetch_snapshot hands back the same dict while the export body is unchanged)."""
+    global _time_indexes
+    if _time_indexes is None or _time_indexes[0] is not data:
+        _time_indexes = (data, _build_time_indexes(data))
+    return _time_indexes[1]
+
+
+async def run_pipeline(
+    since: datetime | None = None,
+    until: datetime | None = None,
+    window: timedelta | None = None,
+) -> dict:
+    global _insights
+    # Only cache while Convex pushes changes; otherwise insights could go stale.
+    cacheable = since is None and until is None and window is None and bool(settings.ai_webhook_secret)
+    if cacheable and _insights is not None and time.time() - _insights[0] < settings.insights_ttl_seconds:
+        return _insights[1]
+
+    generation = _generation
+    logger.info("Fetching operational data from Convex...")
+    data = await fetch_snapshot()
+
+    insights, from_fallback = await generate_insights(data, since=since, until=until, window=window)
     
     # Return a dict so main.py can pass it cleanly back to the client
-    return insights.model_dump()
+    result = insights.model_dump()
+    # Rule-based fallbacks are not cached, so the next request retries OpenAI.
+    if cacheable and not from_fallback and generation == _generation:
+        _insights = (time.time(), result)
+    return result
 
 
-async def generate_insights(data: dict) -> AnalysisResult:
-    logger.info("Calculating Tactical Metrics...")
-    
+def _window_metrics(
+    indexes: dict,
+    since: datetime | None,
+    until: datetime | None,
+    window: timedelta | None,
+) -> dict:
+    """Incident and dispatch metrics for [since, until). With `window` given, an
+    open `until` means now, so the counts and the rolling series share one anchor;
+    with only `window` the range is the trailing window ending at `until`."""
+    if window is not None:
+        until = until or datetime.now(timezone.utc)
+        if since is None:
+            since = until - window
+
+    incidents = indexes["incidents"]
+    dispatches = indexes["dispatches"]
+    avg_severity = incidents.mean("severityLevel", since, until)
+
+    metrics = {
+        "since": since.isoformat() if since else None,
+        "until": until.isoformat() if until else None,
+        "incidents": incidents.count(since, until),
+        "avg_severity": round(avg_severity, 1) if avg_severity is not None else None,
+        "incidents_by_severity": incidents.counts_by("severityLevel", since, until),
+        "incidents_by_type": incidents.counts_by("type", since, until),
+        "incidents_by_status": incidents.counts_by("status", since, until),
+        "dispatches": dispatches.count(since, until),
+    }
+    if window is not None:
+        step = timedelta(days=1) if window >= timedelta(days=1) else timedelta(hours=1)
+        metrics["window_seconds"] = int(window.total_seconds())
+        metrics["rolling_dispatch_load"] = dispatches.rolling_counts(window, step, since, until)
+    return metrics
+
+
+def _compute_metrics(
+    data: dict,
+    indexes: dict | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    window: timedelta | None = None,
+) -> MetricData:
     incidents = data.get("incidents", [])
     personnel = data.get("personnel", [])
     equipment = data.get("equipment", [])
@@ -39,6 +240,7 @@ async def generate_insights(data: dict) -> AnalysisResult:
 
     # 1. Calculate Operations Metrics
     total_incidents = len(incidents)
+    open_incidents = len([i for i in incidents if i.get("status") in ("standby", "active")])
     avg_severity = sum(i.get("severityLevel", 1) for i in incidents) / max(total_incidents, 1)
     
     available_personnel = len([p for p in personnel if p.get("isAvailable", False)])
@@ -47,9 +249,16 @@ async def generate_insights(data: dict) -> AnalysisResult:
     in_use_eq = len([e for e in equipment if e.get("status") == "In Use"])
     critical_maintenance = len([m for m in maintenance if m.get("issueType") == "Damage"])
 
+    window_metrics = None
+    if indexes is not None:
+        window_metrics = _window_metrics(indexes, since, until, window)
+        total_incidents = window_metrics["incidents"]
+        avg_severity = window_metrics["avg_severity"] or 0
+
     raw_metrics = MetricData(
         incidents={
             "total_incidents": total_incidents, 
+            "open_incidents": open_incidents,
             "avg_severity": round(avg_severity, 1), 
             "avg_response_time": "12m" # Placeholder for future GPS timestamp math
         },
@@ -64,9 +273,26 @@ async def generate_insights(data: dict) -> AnalysisResult:
         maintenance={
             "total_logs": len(maintenance), 
             "critical_issues": critical_maintenance
-        }
+        },
+        window=window_metrics,
     )
 
+    return raw_metrics
+
+
+async def generate_insights(
+    data: dict,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    window: timedelta | None = None,
+) -> tuple[AnalysisResult, bool]:
+    """Insights for `data` and whether they came from the rule-based fallback."""
+    logger.info("Calculating Tactical Metrics...")
+    indexes = None
+    if since is not None or until is not None or window is not None:
+        indexes = get_time_indexes(data)
+    raw_metrics = _compute_metrics(data, indexes, since, until, window)
+
     # 2. Generate AI Tactical Report
     logger.info("Generating AI Analysis via OpenAI...")
     prompt = f"""
@@ -86,9 +312,9 @@ async def generate_insights(data: dict) -> AnalysisResult:
     """
 
     try:
-        response = await client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "system", "content": prompt}],
+        response = await complete(
+            "insights",
+            prompt,
             response_format={"type": "json_object"},
             temperature=0.4
         )
@@ -96,8 +322,11 @@ async def generate_insights(data: dict) -> AnalysisResult:
         result_dict = json.loads(response.choices[0].message.content)
         result_dict["raw_metrics"] = raw_metrics.model_dump()
         
-        return AnalysisResult(**result_dict)
+        return AnalysisResult(**result_dict), False
         
+    except LLMUnavailableError as e:
+        logger.warning(f"OpenAI unavailable, using rule-based insights: {e}")
+        return _fallback_insights(raw_metrics), True
     except Exception as e:
         logger.error(f"Failed to generate insights: {e}")
         raise e
@@ -110,14 +339,14 @@ async def generate_dispatch_recommendation(data: dict) -> dict:
     logger.info(f"[dispatch-rec] Available equipment count: {len(data.get('available_equipment', []))}")
     logger.info(f"[dispatch-rec] GPS coordinates: {data.get('gps_coordinates')}")
 
-    personnel_list = "\n".join(
+    personnel_list = "\n".join(cap_list([
         f"- {p.get('name')} | Role: {p.get('role')} | Certifications: {', '.join(p.get('certifications', []))}"
         for p in data.get("available_personnel", [])
-    )
-    equipment_list = "\n".join(
+    ]))
+    equipment_list = "\n".join(cap_list([
         f"- {e.get('name')} | Category: {e.get('category', 'N/A')}"
         for e in data.get("available_equipment", [])
-    )
+    ]))
 
     logger.info(f"[dispatch-rec] Personnel list for prompt:\n{personnel_list or 'None'}")
     logger.info(f"[dispatch-rec] Equipment list for prompt:\n{equipment_list or 'None'}")
@@ -146,12 +375,12 @@ async def generate_dispatch_recommendation(data: dict) -> dict:
     Return ONLY a valid JSON object with these three keys.
     """
 
-    logger.info("[dispatch-rec] Calling OpenAI GPT-4o...")
+    logger.info(f"[dispatch-rec] Calling OpenAI {model_for('dispatch')}...")
 
     try:
-        response = await client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "system", "content": prompt}],
+        response = await complete(
+            "dispatch",
+            prompt,
             response_format={"type": "json_object"},
             temperature=0.3
         )
@@ -160,6 +389,9 @@ async def generate_dispatch_recommendation(data: dict) -> dict:
         result = json.loads(raw_content)
         logger.info(f"[dispatch-rec] Parsed result: {result}")
         return result
+    except LLMUnavailableError as e:
+        logger.warning(f"[dispatch-rec] OpenAI unavailable, using rule-based recommendation: {e}")
+        return _fallback_dispatch_recommendation(data)
     except json.JSONDecodeError as e:
         logger.error(f"[dispatch-rec] JSON parse error: {e}")
         logger.error(f"[dispatch-rec] Raw content was: {raw_content}")
@@ -179,18 +411,81 @@ async def generate_personnel_summary(personnel_data: dict) -> str:
     Name: {personnel_data.get('name')}
     Role: {personnel_data.get('role')}
     Certifications: {', '.join(personnel_data.get('certifications', []))}
-    Recent Missions: {personnel_data.get('recent_incidents', [])}
+    Recent Missions: {summarize_incidents(personnel_data.get('recent_incidents', []))}
     
     Focus on their expertise level and typical incident exposure. Be concise and professional.
     """
 
     try:
-        response = await client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}],
+        response = await complete(
+            "personnel_summary",
+            prompt,
+            role="user",
             temperature=0.5
         )
         return response.choices[0].message.content.strip()
+    except LLMUnavailableError as e:
+        logger.warning(f"OpenAI unavailable, using templated personnel summary: {e}")
+        return _fallback_personnel_summary(personnel_data)
     except Exception as e:
         logger.error(f"Failed to generate personnel summary: {e}")
-        return "Tactical profile generation failed."
\ No newline at end of file
+        return "Tactical profile generation failed."
+
+
+# Deterministic fallbacks, served when the OpenAI circuit is open or a call
+# exhausts its retries/deadline.
+
+def _fallback_insights(raw_metrics: MetricData) -> AnalysisResult:
+    incidents = raw_metrics.incidents
+    personnel = raw_metrics.personnel
+    equipment = raw_metrics.equipment
+    maintenance = raw_metrics.maintenance
+
+    recommendations = ["Review readiness once AI analysis is available again."]
+    actions = []
+    if personnel["available_personnel"] < incidents.get("open_incidents", 0):
+        recommendations.insert(0, "Call in off-duty personnel: open incidents exceed available rescuers.")
+    if maintenance["critical_issues"] > 0:
+        actions.append(f"Ground and inspect equipment with {maintenance['critical_issues']} open damage reports.")
+    if incidents["avg_severity"] >= 4:
+        actions.append("Prioritise high-severity incidents for medically certified teams.")
+
+    return AnalysisResult(
+        executive_summary=(
+            f"{incidents['total_incidents']} incidents at average severity {incidents['avg_severity']}, "
+            f"with {personnel['available_personnel']} personnel available and "
+            f"{equipment['in_use']}/{equipment['total']} equipment items in use. "
+            "AI analysis is temporarily unavailable; this summary is rule-based."
+        ),
+        key_findings={"narrative": "AI analysis unavailable - figures shown are raw operational metrics."},
+        recommendations=recommendations,
+        operational_actions=actions,
+        raw_metrics=raw_metrics,
+    )
+
+
+def _fallback_dispatch_recommendation(data: dict) -> dict:
+    severity = data.get("severity_level", 1)
+    personnel = data.get("available_personnel", [])
+    equipment = data.get("available_equipment", [])
+    # Most certified first; team and kit size grow with severity.
+    personnel = sorted(personnel, key=lambda p: len(p.get("certifications", [])), reverse=True)
+    team_size = 1 if severity <= 2 else 2 if severity <= 4 else 3
+
+    return {
+        "recommended_personnel": [p.get("name") for p in personnel[:team_size] if p.get("name")],
+        "recommended_equipment": [e.get("name") for e in equipment[:team_size + 1] if e.get("name")],
+        "rationale": (
+            "AI advisor unavailable: selected the most certified available personnel "
+            f"and equipment scaled to severity {severity}."
+        ),
+    }
+
+
+def _fallback_personnel_summary(personnel_data: dict) -> str:
+    certifications = personnel_data.get("certifications", [])
+    return (
+        f"{personnel_data.get('name')} serves as {personnel_data.get('role')} "
+        f"with {len(certifications)} certification(s){': ' + ', '.join(certifications) if certifications else ''}. "
+        f"Involved in {len(personnel_data.get('recent_incidents', []))} recent mission(s)."
+    )
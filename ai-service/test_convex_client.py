@@ -0,0 +1,106 @@
+import asyncio
+
+import httpx
+import pytest
+
+import convex_client
+from convex_client import fetch, invalidate_cache
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 1_000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def convex(monkeypatch):
+    """Fake Convex: records fetched tables and fails those listed in `failing`."""
+    clock = FakeTime()
+    state = {"calls": [], "failing": set(), "version": 1, "clock": clock}
+
+    async def fake_fetch_table(client, function_path, limit=100000, offset=0):
+        name = next(n for n, path in convex_client.TABLES.items() if path == function_path)
+        state["calls"].append(name)
+        if name in state["failing"]:
+            raise httpx.ConnectError("convex down")
+        return [{"table": name, "version": state["version"]}]
+
+    monkeypatch.setattr(convex_client, "_fetch_table", fake_fetch_table)
+    monkeypatch.setattr(convex_client, "get_http_client", lambda: None)
+    monkeypatch.setattr(convex_client, "time", clock)
+    monkeypatch.setattr(convex_client.settings, "table_ttl_seconds", {"clients": 3600, "transactions": 30})
+    monkeypatch.setattr(convex_client.settings, "cache_ttl_seconds", 300)
+    monkeypatch.setattr(convex_client.settings, "convex_retry_seconds", 15)
+    invalidate_cache()
+    yield state
+    invalidate_cache()
+
+
+def test_each_table_expires_on_its_own_ttl(convex):
+    asyncio.run(fetch(["clients", "transactions", "orders"]))
+    assert sorted(convex["calls"]) == ["clients", "orders", "transactions"]
+
+    convex["calls"].clear()
+    convex["clock"].now += 31
+    asyncio.run(fetch(["clients", "transactions", "orders"]))
+    assert convex["calls"] == ["transactions"]
+
+    convex["calls"].clear()
+    convex["clock"].now += 300
+    asyncio.run(fetch(["clients", "transactions", "orders"]))
+    assert sorted(convex["calls"]) == ["orders", "transactions"]
+
+
+def test_failed_refresh_serves_stale_copy_and_backs_off(convex):
+    asyncio.run(fetch(["transactions"]))
+    convex["version"] = 2
+    convex["failing"].add("transactions")
+    convex["clock"].now += 31
+
+    data = asyncio.run(fetch(["transactions"]))
+    assert data["transactions"][0]["version"] == 1
+    assert convex["calls"] == ["transactions", "transactions"]
+
+    # Within the retry interval the stale copy is served without hitting Convex.
+    convex["clock"].now += 10
+    asyncio.run(fetch(["transactions"]))
+    assert len(convex["calls"]) == 2
+
+    convex["failing"].clear()
+    convex["clock"].now += 5
+    data = asyncio.run(fetch(["transactions"]))
+    assert data["transactions"][0]["version"] == 2
+    assert len(convex["calls"]) == 3
+
+
+def test_failure_without_cached_copy_raises(convex):
+    convex["failing"].add("orders")
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(fetch(["clients", "orders"]))
+    # No back-off without a copy to serve: the next call tries again.
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(fetch(["orders"]))
+    assert convex["calls"].count("orders") == 2
+
+
+def test_unknown_tables_are_rejected(convex):
+    with pytest.raises(KeyError, match="incidents"):
+        asyncio.run(fetch(["clients", "incidents"]))
+    assert convex["calls"] == []
+
+
+def test_invalidate_cache_drops_only_named_tables(convex):
+    asyncio.run(fetch(["clients", "products"]))
+    convex["calls"].clear()
+
+    invalidate_cache(["clients"])
+    asyncio.run(fetch(["clients", "products"]))
+    assert convex["calls"] == ["clients"]
+
+    convex["calls"].clear()
+    invalidate_cache()
+    asyncio.run(fetch(["clients", "products"]))
+    assert sorted(convex["calls"]) == ["clients", "products"]
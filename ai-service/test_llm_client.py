@@ -0,0 +1,201 @@
+import asyncio
+from collections import deque
+
+import httpx
+import openai
+import pytest
+
+import llm_client
+from llm_client import CircuitBreaker, LLMUnavailableError, chat_completion
+
+_REQUEST = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+
+
+def _status_error(cls: type[openai.APIStatusError], status: int) -> openai.APIStatusError:
+    return cls(f"HTTP {status}", response=httpx.Response(status, request=_REQUEST), body=None)
+
+
+class FakeCompletions:
+    """Stands in for `AsyncOpenAI().chat.completions`: each call pops the next
+    scripted outcome (an exception to raise, or a value to return) after `delay`."""
+
+    def __init__(self, outcomes: list, delay: float = 0.0):
+        self.outcomes = list(outcomes)
+        self.delay = delay
+        self.calls = 0
+        self.cancelled = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if self.outcomes else "ok"
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+
+class FakeClient:
+    def __init__(self, completions: FakeCompletions):
+        self.chat = type("Chat", (), {"completions": completions})()
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    """Install a fresh fake client, breaker, semaphore and fast retry settings."""
+
+    def install(outcomes=(), delay=0.0, concurrency=8, failures=3, reset=60.0):
+        completions = FakeCompletions(list(outcomes), delay)
+        monkeypatch.setattr(llm_client, "_client", FakeClient(completions))
+        monkeypatch.setattr(llm_client, "breaker", CircuitBreaker(failures, reset))
+        monkeypatch.setattr(llm_client, "_semaphore", asyncio.Semaphore(concurrency))
+        monkeypatch.setattr(llm_client, "_latencies", deque(maxlen=200))
+        return completions
+
+    monkeypatch.setattr(llm_client.settings, "openai_max_retries", 2)
+    monkeypatch.setattr(llm_client.settings, "openai_backoff_base_seconds", 0.001)
+    monkeypatch.setattr(llm_client.settings, "openai_backoff_cap_seconds", 0.01)
+    monkeypatch.setattr(llm_client.settings, "openai_hedge_enabled", False)
+    return install
+
+
+def _other_tasks() -> list[asyncio.Task]:
+    return [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+
+def test_retries_transient_errors_then_succeeds(fake):
+    completions = fake([
+        _status_error(openai.RateLimitError, 429),
+        _status_error(openai.InternalServerError, 500),
+        "done",
+    ])
+    attempts = []
+    result = asyncio.run(chat_completion(model="m", on_attempt=lambda *a: attempts.append(a)))
+
+    assert result == "done"
+    assert completions.calls == 3
+    assert [error is None for _, _, error in attempts] == [False, False, True]
+    assert llm_client.breaker.state == "closed"
+
+
+def test_client_error_passes_through_without_tripping_breaker(fake):
+    completions = fake([_status_error(openai.BadRequestError, 400)])
+    llm_client.breaker._failures = 2
+
+    with pytest.raises(openai.BadRequestError):
+        asyncio.run(chat_completion(model="m"))
+    assert completions.calls == 1
+    assert llm_client.breaker._failures == 0
+
+
+def test_breaker_opens_after_failures_then_probes(fake, monkeypatch):
+    monkeypatch.setattr(llm_client.settings, "openai_max_retries", 0)
+    completions = fake([_status_error(openai.InternalServerError, 503)] * 3, failures=3, reset=0.05)
+
+    async def scenario():
+        for _ in range(3):
+            with pytest.raises(LLMUnavailableError):
+                await chat_completion(model="m")
+        assert llm_client.breaker.state == "open"
+        with pytest.raises(LLMUnavailableError, match="circuit breaker is open"):
+            await chat_completion(model="m")
+        assert completions.calls == 3
+
+        await asyncio.sleep(0.06)
+        assert llm_client.breaker.state == "half_open"
+        completions.delay = 0.02
+        probe = asyncio.create_task(chat_completion(model="m"))
+        await asyncio.sleep(0)
+        # Only one probe at a time while half-open.
+        with pytest.raises(LLMUnavailableError, match="circuit breaker is open"):
+            await chat_completion(model="m")
+        assert await probe == "ok"
+        assert llm_client.breaker.state == "closed"
+
+    asyncio.run(scenario())
+
+
+def test_deadline_cuts_off_call_and_counts_as_failure(fake):
+    completions = fake(delay=1.0)
+
+    async def scenario():
+        with pytest.raises(LLMUnavailableError, match="deadline"):
+            await chat_completion(model="m", deadline=0.02)
+        assert _other_tasks() == []
+        assert llm_client._semaphore._value == 8
+
+    asyncio.run(scenario())
+    assert completions.cancelled == 1
+    assert llm_client.breaker._failures == 1
+
+
+@pytest.mark.parametrize("hedge_after", [0.5, 0.005])
+def test_deadline_cancels_hedged_requests(fake, monkeypatch, hedge_after):
+    """The deadline can hit while waiting to hedge (0.5s) or after the hedge is sent."""
+    monkeypatch.setattr(llm_client.settings, "openai_hedge_enabled", True)
+    completions = fake(delay=1.0)
+    llm_client._latencies.extend([hedge_after] * 30)
+
+    async def scenario():
+        with pytest.raises(LLMUnavailableError, match="deadline"):
+            await chat_completion(model="m", deadline=0.05)
+        assert _other_tasks() == []
+        assert llm_client._semaphore._value == 8
+
+    asyncio.run(scenario())
+    assert completions.calls == (1 if hedge_after > 0.05 else 2)
+    assert completions.cancelled == completions.calls
+
+
+def test_hedge_wins_and_loser_is_cancelled(fake, monkeypatch):
+    monkeypatch.setattr(llm_client.settings, "openai_hedge_enabled", True)
+    completions = fake(["slow", "fast"])
+    llm_client._latencies.extend([0.01] * 30)
+
+    async def create(**kwargs):
+        completions.calls += 1
+        delay, outcome = (1.0, "slow") if completions.calls == 1 else (0.01, "fast")
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            completions.cancelled += 1
+            raise
+        return outcome
+
+    completions.create = create
+
+    async def scenario():
+        assert await chat_completion(model="m") == "fast"
+        assert _other_tasks() == []
+        assert llm_client._semaphore._value == 8
+
+    asyncio.run(scenario())
+    assert completions.cancelled == 1
+
+
+def test_no_hedge_without_a_free_slot(fake, monkeypatch):
+    monkeypatch.setattr(llm_client.settings, "openai_hedge_enabled", True)
+    completions = fake(delay=0.05, concurrency=1)
+    llm_client._latencies.extend([0.001] * 30)
+
+    assert asyncio.run(chat_completion(model="m")) == "ok"
+    assert completions.calls == 1
+
+
+def test_slot_wait_timeout_does_not_count_against_breaker(fake):
+    completions = fake(delay=0.2, concurrency=1)
+
+    async def scenario():
+        holder = asyncio.create_task(chat_completion(model="m"))
+        await asyncio.sleep(0.01)
+        with pytest.raises(LLMUnavailableError, match="concurrency slot"):
+            await chat_completion(model="m", deadline=0.02)
+        assert llm_client.breaker._failures == 0
+        assert await holder == "ok"
+
+    asyncio.run(scenario())
+    assert completions.calls == 1
+    assert llm_client.breaker.state == "closed"
@@ -0,0 +1,47 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """App client (no lifespan) whose pipeline records its arguments."""
+    calls = []
+
+    async def fake_run_pipeline(**kwargs):
+        calls.append(kwargs)
+        raise RuntimeError("pipeline not available in tests")
+
+    monkeypatch.setattr(main, "run_pipeline", fake_run_pipeline)
+    test_client = TestClient(main.app)
+    test_client.calls = calls
+    return test_client
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"window": "PT0S"},
+        {"window": "-PT1H"},
+        {"since": "2024-02-01T00:00:00Z", "until": "2024-01-01T00:00:00Z"},
+        {"since": "2024-01-01T00:00:00", "until": "2024-01-01T00:00:00Z"},
+        {"since": "2999-01-01T00:00:00Z", "window": "P1D"},
+    ],
+)
+def test_invalid_ranges_are_rejected(client, params):
+    assert client.get("/insights", params=params).status_code == 422
+    assert client.calls == []
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"window": "P7D"},
+        {"since": "2024-01-01T00:00:00Z"},
+        {"since": "2024-01-01T00:00:00", "until": "2024-01-02T00:00:00+01:00"},
+    ],
+)
+def test_valid_ranges_reach_the_pipeline(client, params):
+    assert client.get("/insights", params=params).status_code == 500
+    assert len(client.calls) == 1
@@ -0,0 +1,81 @@
+import asyncio
+import json
+
+import pytest
+
+import pipeline
+
+
+class FakeResponse:
+    def __init__(self, payload: dict):
+        self.content = json.dumps(payload).encode()
+
+    def raise_for_status(self) -> None:
+        pass
+
+
+@pytest.fixture
+def export(monkeypatch):
+    """Serve `state["payload"]` as the Convex export; count index builds."""
+    state = {
+        "payload": {"incidents": [], "dispatches": [{"dispatchTime": "2024-01-01T00:00:00Z"}]},
+        "builds": 0,
+        "fetches": 0,
+    }
+
+    class Client:
+        async def get(self, url):
+            state["fetches"] += 1
+            return FakeResponse(state["payload"])
+
+    build = pipeline._build_time_indexes
+
+    def counting_build(data):
+        state["builds"] += 1
+        return build(data)
+
+    monkeypatch.setattr(pipeline, "get_http_client", lambda: Client())
+    monkeypatch.setattr(pipeline, "_build_time_indexes", counting_build)
+    monkeypatch.setattr(pipeline.settings, "snapshot_ttl_seconds", 0)
+    monkeypatch.setattr(pipeline.settings, "insights_ttl_seconds", 300)
+    monkeypatch.setattr(pipeline.settings, "ai_webhook_secret", "")
+    monkeypatch.setattr(pipeline, "_snapshot", None)
+    monkeypatch.setattr(pipeline, "_last_export", None)
+    monkeypatch.setattr(pipeline, "_time_indexes", None)
+    return state
+
+
+def test_unchanged_export_reuses_decoded_snapshot_and_indexes(export):
+    first = asyncio.run(pipeline.fetch_snapshot())
+    second = asyncio.run(pipeline.fetch_snapshot())
+    assert second is first
+
+    pipeline.get_time_indexes(first)
+    pipeline.get_time_indexes(second)
+    assert export["builds"] == 1
+
+
+def test_changed_export_rebuilds_indexes(export):
+    first = asyncio.run(pipeline.fetch_snapshot())
+    pipeline.get_time_indexes(first)
+
+    export["payload"] = {**export["payload"], "incidents": [{"reportedDate": "2024-01-02T00:00:00Z"}]}
+    second = asyncio.run(pipeline.fetch_snapshot())
+    assert second is not first
+    assert len(pipeline.get_time_indexes(second)["incidents"]) == 1
+    assert export["builds"] == 2
+
+
+def test_snapshot_is_reused_while_webhooks_keep_it_current(export, monkeypatch):
+    asyncio.run(pipeline.fetch_snapshot())
+    asyncio.run(pipeline.fetch_snapshot())
+    assert export["fetches"] == 2
+
+    monkeypatch.setattr(pipeline.settings, "ai_webhook_secret", "secret")
+    first = asyncio.run(pipeline.fetch_snapshot())
+    assert asyncio.run(pipeline.fetch_snapshot()) is first
+    assert export["fetches"] == 3
+
+    pipeline.invalidate_snapshot()
+    asyncio.run(pipeline.fetch_snapshot())
+    assert export["fetches"] == 4
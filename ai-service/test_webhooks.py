@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import invalidation
+import main
+import pipeline
+from invalidation import apply_changes
+
+
+@pytest.fixture
+def state(monkeypatch):
+    """Empty caches and a run_pipeline stub that counts recomputations."""
+    counts = {"recomputes": 0}
+
+    async def fake_run_pipeline():
+        counts["recomputes"] += 1
+
+    monkeypatch.setattr(invalidation, "run_pipeline", fake_run_pipeline)
+    monkeypatch.setattr(invalidation.settings, "webhook_debounce_seconds", 0.01)
+    monkeypatch.setattr(invalidation.settings, "webhook_recompute_insights", True)
+    monkeypatch.setattr(invalidation.settings, "webhook_max_age_seconds", 300)
+    monkeypatch.setattr(pipeline, "_snapshot", None)
+    monkeypatch.setattr(pipeline, "_insights", None)
+    monkeypatch.setattr(pipeline, "_tombstones", {})
+    yield counts
+    invalidation.cancel_recompute()
+
+
+def _change(table, operation, id="r1", document=None, fields=None):
+    return {"table": table, "operation": operation, "id": id, "document": document, "fields": fields}
+
+
+@pytest.mark.parametrize(
+    ("change", "affects"),
+    [
+        (_change("personnel", "update", fields=["aiProfileSummary"]), False),
+        (_change("personnel", "update", fields=["aiProfileSummary", "isAvailable"]), True),
+        (_change("personnel", "update"), True),  # fields unknown
+        (_change("equipment", "update", fields=["image"]), False),
+        (_change("incidents", "delete"), True),
+        (_change("dispatches", "insert", document={"_id": "r1"}), False),
+        (_change("users", "insert"), False),
+    ],
+)
+def test_affects_insights(change, affects):
+    assert pipeline.affects_insights(change) is affects
+
+
+def test_burst_of_changes_recomputes_once(state):
+    async def scenario():
+        for i in range(3):
+            assert apply_changes([_change("incidents", "delete", id=f"i{i}")])["recompute_scheduled"]
+            await asyncio.sleep(0.002)
+        await asyncio.sleep(0.05)
+
+    asyncio.run(scenario())
+    assert state["recomputes"] == 1
+
+
+def test_profile_summary_update_keeps_insights_and_skips_recompute(state):
+    pipeline._insights = (0.0, {"cached": True})
+
+    async def scenario():
+        result = apply_changes([_change("personnel", "update", fields=["aiProfileSummary"])])
+        await asyncio.sleep(0.05)
+        return result
+
+    result = asyncio.run(scenario())
+    assert result == {"tables": ["personnel"], "snapshot": "not_cached", "recompute_scheduled": False}
+    assert pipeline._insights == (0.0, {"cached": True})
+    assert state["recomputes"] == 0
+
+
+SECRET = "test-secret"
+
+
+@pytest.fixture
+def client(state, monkeypatch):
+    """App client (no lifespan) with webhooks enabled and no replay history."""
+    monkeypatch.setattr(invalidation.settings, "ai_webhook_secret", SECRET)
+    monkeypatch.setattr(invalidation.settings, "webhook_recompute_insights", False)
+    monkeypatch.setattr(invalidation, "_seen", {})
+    return TestClient(main.app)
+
+
+def _body(changes, sent_at=None) -> bytes:
+    sent_at = time.time() * 1000 if sent_at is None else sent_at
+    return json.dumps({"sent_at": int(sent_at), "changes": changes}).encode()
+
+
+def _post(client, body, signature=None):
+    if signature is None:
+        signature = "sha256=" + hmac.new(SECRET.encode(), body, hashlib.sha256).hexdigest()
+    return client.post("/webhooks/convex-change", content=body, headers={"X-Webhook-Signature": signature})
+
+
+def _cache(incidents, insights=(0.0, {"cached": True})):
+    pipeline._snapshot = (time.time(), {"incidents": incidents})
+    pipeline._insights = insights
+
+
+def test_signature_is_required(client):
+    body = _body([_change("incidents", "delete")])
+    assert _post(client, body, signature="sha256=" + "0" * 64).status_code == 401
+    assert client.post("/webhooks/convex-change", content=body).status_code == 401
+    assert _post(client, body).status_code == 200
+
+
+def test_stale_and_replayed_deliveries_are_rejected(client):
+    stale = _body([_change("incidents", "delete")], sent_at=(time.time() - 301) * 1000)
+    assert _post(client, stale).status_code == 401
+
+    body = _body([_change("incidents", "delete")])
+    assert _post(client, body).status_code == 200
+    assert _post(client, body).status_code == 409
+
+
+def test_inserts_and_deletes_commute(client):
+    _cache([{"_id": "a"}])
+    row_b = {"_id": "b", "severityLevel": 3}
+
+    # Delete delivered before the insert it follows: the row must not come back.
+    delete_b = _change("incidents", "delete", id="b")
+    insert_b = _change("incidents", "insert", id="b", document=row_b)
+    assert _post(client, _body([delete_b])).json()["snapshot"] == "patched"
+    assert _post(client, _body([insert_b])).json()["snapshot"] == "patched"
+    assert pipeline._snapshot[1]["incidents"] == [{"_id": "a"}]
+
+    # Insert of a row the snapshot already has is not duplicated.
+    row_c = {"_id": "c"}
+    insert_c = _change("incidents", "insert", id="c", document=row_c)
+    _post(client, _body([insert_c]))
+    _post(client, _body([insert_c, _change("incidents", "delete", id="a")]))
+    assert pipeline._snapshot[1]["incidents"] == [row_c]
+
+
+def test_update_invalidates_snapshot(client):
+    _cache([{"_id": "a"}])
+    response = _post(client, _body([_change("incidents", "update", id="a", fields=["status"])]))
+    assert response.json() == {
+        "tables": ["incidents"],
+        "snapshot": "invalidated",
+        "recompute_scheduled": False,
+    }
+    assert pipeline._snapshot is None
+    assert pipeline._insights is None
+
+
+def test_insights_dropped_only_for_snapshot_tables(client):
+    _cache([])
+    assert _post(client, _body([_change("mission_reports", "delete")])).json()["snapshot"] == "unaffected"
+    assert pipeline._insights is not None
+
+    _post(client, _body([_change("incidents", "delete")]))
+    assert pipeline._insights is None
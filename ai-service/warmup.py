@@ -0,0 +1,54 @@
+import asyncio
+import importlib
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Imported lazily by the request handlers; pre-imported here when warm-up is on.
+HEAVY_MODULES = (
+    "pandas",
+    "scipy.stats",
+    "analyzers.temporal",
+    "analyzers.demographics",
+    "analyzers.products",
+    "analyzers.transactions",
+    "analyzers.returns",
+    "report_generator",
+)
+
+state: dict = {
+    "ready": False,
+    "warmup_seconds": None,
+    "errors": [],
+}
+
+
+def _import_heavy_modules() -> None:
+    for name in HEAVY_MODULES:
+        importlib.import_module(name)
+
+
+async def warm_up() -> None:
+    """Pre-import heavy modules, build the OpenAI client and fetch the Convex
+    export once (opening pooled HTTP connections; the result is only reused when
+    SNAPSHOT_TTL_SECONDS > 0 or change webhooks are configured), then flip readiness. Failures are logged and
+    recorded but do not block readiness."""
+    from llm_client import get_client
+    from pipeline import fetch_snapshot
+
+    started = time.perf_counter()
+    steps = {
+        "imports": asyncio.to_thread(_import_heavy_modules),
+        "snapshot": fetch_snapshot(),
+    }
+    results = await asyncio.gather(*steps.values(), return_exceptions=True)
+    for step, result in zip(steps, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Warm-up step '{step}' failed: {type(result).__name__}: {result}")
+            state["errors"].append(f"{step}: {type(result).__name__}: {result}")
+    get_client()
+
+    state["warmup_seconds"] = round(time.perf_counter() - started, 3)
+    state["ready"] = True
+    logger.info(f"Warm-up finished in {state['warmup_seconds']}s")